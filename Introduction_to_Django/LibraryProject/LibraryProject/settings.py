@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -72,10 +73,29 @@ WSGI_APPLICATION = 'LibraryProject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuning applied to every new connection; see advanced-api-project/api/README2.md
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32 * 1024,  # KiB, per connection
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': '; '.join(f'PRAGMA {name} = {value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock at BEGIN so concurrent writers wait on the
+            # busy timeout instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Persistent connections only pay off under WSGI; 0 is ASGI-safe
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'advanced_api_project.settings')
 
 application = get_asgi_application()
+
+# Build the autocomplete index before the first request needs it
+from api.autocomplete import warm  # noqa: E402
+
+warm()
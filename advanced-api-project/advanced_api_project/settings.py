@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.timing.ServerTimingMiddleware',
+    'api.replicas.ReadYourWritesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,13 +79,47 @@ WSGI_APPLICATION = 'advanced_api_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuning applied to every new connection: WAL lets readers run next to
+# a writer, NORMAL sync is durable enough under WAL, and a bigger page cache,
+# memory-mapped reads and in-memory temp tables cut I/O.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -32 * 1024,  # KiB, per connection
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': '; '.join(f'PRAGMA {name} = {value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Take the write lock at BEGIN so concurrent writers wait on the
+            # busy timeout instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Seconds to reuse a connection (and its warm page cache) across
+        # requests. Off by default: under ASGI every request gets its own
+        # connection, so only WSGI deployments should set this (e.g. 600).
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Read-only copy of the primary. Locally a SQLite snapshot refreshed with
+# `manage.py snapshot_replicas`; in production a real replica. Only used once
+# listed in API_READ_REPLICAS.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': BASE_DIR / 'replica.sqlite3',
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,7 +161,7 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ],
     # Default permission is AllowAny; we will secure specific views explicitly.
@@ -139,6 +176,51 @@ REST_FRAMEWORK = {
 }
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Cache used for API responses (any Django cache backend works)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+API_CACHE_ENABLED = True
+API_CACHE_ALIAS = "default"
+# Seconds a cached book response is kept; writes invalidate it earlier
+API_CACHE_TIMEOUT = 300
+
+# Seconds a token -> user resolution is cached (shared cache / per process)
+API_TOKEN_CACHE_TIMEOUT = 300
+API_TOKEN_CACHE_LOCAL_TIMEOUT = 5
+
+# "side-by-side" serves async versions of the book views under /api/async/
+API_ASYNC_VIEWS = "side-by-side"
+
+# Rows per INSERT for bulk book writes
+API_BULK_BATCH_SIZE = 500
+
+# Build book read responses from values() rows instead of model instances
+# (same JSON, much less CPU); serializers it cannot express fall back
+API_FAST_SERIALIZATION = False
+
+# Server-Timing headers and a JSON log line ("api.timing" logger) with query
+# count, DB time and view/serialize/render phases, for this fraction of
+# requests. Staff users can ask for them on any request with X-Server-Timing.
+API_SERVER_TIMING = False
+API_SERVER_TIMING_SAMPLE_RATE = 0.01
+
+# Aliases the book/author list and detail views read from ("round-robin" or
+# "least-load"); a client that wrote reads from the primary for the window
+API_READ_REPLICAS = []
+API_REPLICA_SELECTION = "round-robin"
+API_READ_YOUR_WRITES_WINDOW = 5
+
+# In-process prefix index behind /api/books/autocomplete/. It is rebuilt in
+# the background once older than MAX_AGE seconds (to pick up other processes'
+# writes) and replaced by database lookups if it would outgrow MAX_BYTES.
+API_AUTOCOMPLETE_INDEX = True
+API_AUTOCOMPLETE_MAX_AGE = 300
+API_AUTOCOMPLETE_MAX_BYTES = 256 * 1024 * 1024  # about 800k titles and names
+
 # Use a separate in-memory database for tests
 # Use a separate test database
 TEST_DATABASES = {
@@ -147,7 +229,3 @@ TEST_DATABASES = {
         "NAME": ":memory:",
     }
 }
-
-
-
-
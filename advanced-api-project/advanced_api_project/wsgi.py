@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'advanced_api_project.settings')
 
 application = get_wsgi_application()
+
+# Build the autocomplete index before the first request needs it
+from api.autocomplete import warm  # noqa: E402
+
+warm()
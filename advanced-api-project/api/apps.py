@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connect cache invalidation signals
+        from . import signals  # noqa: F401
+
+        # Per-request SQL timing (a no-op unless ServerTimingMiddleware is recording)
+        from django.db.backends.signals import connection_created
+        from .timing import instrument_connection
+        connection_created.connect(instrument_connection, dispatch_uid="api.timing")
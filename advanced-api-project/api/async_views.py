@@ -0,0 +1,140 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import Http404
+from rest_framework import generics, status
+from rest_framework.response import Response
+
+from .models import Book
+from .views import BookCreateView, BookDeleteView, BookListView, BookUpdateView
+
+# Native async counterparts of the book views. Querysets are read and written
+# with Django's async ORM; DRF pieces that may touch the database
+# synchronously (authentication, filterset/serializer validation) run through
+# sync_to_async. Under ASGI a request waiting on the database no longer holds
+# a worker thread.
+
+
+def atomic(func):
+    # The async ORM has no transactions; run the write and its counter updates
+    # (see api.counters) in one on a worker thread
+    return sync_to_async(transaction.atomic(func))
+
+
+class AsyncAPIViewMixin:
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Mirrors APIView.dispatch with an awaited handler
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication, permissions, throttling, content negotiation
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        queryset = self.get_queryset()
+        try:
+            obj = await queryset.aget(pk=self.kwargs["pk"])
+        except Book.DoesNotExist:
+            raise Http404(f"No {Book._meta.object_name} matches the given query.")
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def avalidate(self, serializer):
+        # Validators (and related-field lookups) are synchronous
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+
+
+# Async list with the same filtering, searching, ordering and pagination
+class AsyncBookListView(AsyncAPIViewMixin, generics.GenericAPIView):
+    queryset = BookListView.queryset
+    serializer_class = BookListView.serializer_class
+    permission_classes = BookListView.permission_classes
+    filter_backends = BookListView.filter_backends
+    filterset_class = BookListView.filterset_class
+    search_fields = BookListView.search_fields
+    ordering_fields = BookListView.ordering_fields
+    ordering = BookListView.ordering
+    pagination_class = BookListView.pagination_class
+
+    async def get(self, request, *args, **kwargs):
+        # Filterset validation may query (e.g. the author choice)
+        queryset = await sync_to_async(self.filter_queryset)(self.get_queryset())
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+
+# Async detail
+class AsyncBookDetailView(AsyncAPIViewMixin, generics.GenericAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookListView.serializer_class
+    permission_classes = BookListView.permission_classes
+
+    async def get(self, request, *args, **kwargs):
+        book = await self.aget_object()
+        return Response(self.get_serializer(book).data)
+
+
+# Async create
+class AsyncBookCreateView(AsyncAPIViewMixin, generics.GenericAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookListView.serializer_class
+    permission_classes = BookCreateView.permission_classes
+
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        await self.avalidate(serializer)
+        serializer.instance = await atomic(Book.objects.create)(**serializer.validated_data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+# Async update (PUT / PATCH)
+class AsyncBookUpdateView(AsyncAPIViewMixin, generics.GenericAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookListView.serializer_class
+    permission_classes = BookUpdateView.permission_classes
+
+    async def put(self, request, *args, **kwargs):
+        return await self.aupdate(request, partial=False)
+
+    async def patch(self, request, *args, **kwargs):
+        return await self.aupdate(request, partial=True)
+
+    async def aupdate(self, request, partial):
+        book = await self.aget_object()
+        serializer = self.get_serializer(book, data=request.data, partial=partial)
+        await self.avalidate(serializer)
+        for field, value in serializer.validated_data.items():
+            setattr(book, field, value)
+        await atomic(book.save)()
+        return Response(serializer.data)
+
+
+# Async delete
+class AsyncBookDeleteView(AsyncAPIViewMixin, generics.GenericAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookListView.serializer_class
+    permission_classes = BookDeleteView.permission_classes
+
+    async def delete(self, request, *args, **kwargs):
+        book = await self.aget_object()
+        await atomic(book.delete)()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,77 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .timing import phase
+
+# Process-local copies: token digest -> (token with user loaded, expiry)
+_local_tokens = {}
+LOCAL_MAX_ENTRIES = 10000
+
+
+def _cache():
+    return caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+
+
+def _cache_key(digest):
+    return f"api:token:{digest}"
+
+
+def _digest(key):
+    # Never put raw tokens into cache keys
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def forget_tokens(keys):
+    """Drop cached resolutions for these token keys (revoked, rotated, user changed)"""
+    digests = [_digest(key) for key in keys]
+    for digest in digests:
+        _local_tokens.pop(digest, None)
+    _cache().delete_many([_cache_key(digest) for digest in digests])
+
+
+def clear_token_cache():
+    _local_tokens.clear()
+
+
+# Drop-in replacement for TokenAuthentication that caches the token -> user
+# lookup, first in process memory and then in the shared cache, so a hot
+# token costs no queries. Entries are dropped by signals when a token is
+# deleted or its user changes; the short local TTL bounds how long other
+# processes can keep using a revoked token.
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate(self, request):
+        with phase("auth"):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        digest = _digest(key)
+        now = time.monotonic()
+
+        entry = _local_tokens.get(digest)
+        if entry is not None and entry[1] > now:
+            token = entry[0]
+        else:
+            token = _cache().get(_cache_key(digest))
+            if token is None:
+                model = self.get_model()
+                try:
+                    token = model.objects.select_related("user").get(key=key)
+                except model.DoesNotExist:
+                    raise exceptions.AuthenticationFailed("Invalid token.")
+                _cache().set(
+                    _cache_key(digest), token, getattr(settings, "API_TOKEN_CACHE_TIMEOUT", 300)
+                )
+            if len(_local_tokens) >= LOCAL_MAX_ENTRIES:
+                _local_tokens.clear()
+            local_ttl = getattr(settings, "API_TOKEN_CACHE_LOCAL_TIMEOUT", 5)
+            _local_tokens[digest] = (token, now + local_ttl)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        return (token.user, token)
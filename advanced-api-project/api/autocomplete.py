@@ -0,0 +1,282 @@
+import bisect
+import logging
+import string
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Lower
+
+from .filters import prefix_upper_bound
+from .models import Author, Book, BookYearCount
+
+logger = logging.getLogger("api.autocomplete")
+
+BOOK = "book"
+AUTHOR = "author"
+
+# Approximate bytes per entry besides its two strings: the slots in both
+# arrays, the entry tuple and the position dict item
+ENTRY_OVERHEAD = 200
+BUILD_CHUNK_SIZE = 5000
+
+
+# Folds ASCII letters only, as SQLite's lower() does, so the index and the
+# database fallback (which seeks on a lower() expression index) agree on both
+# what matches and in which order
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def normalize(text):
+    return text.translate(_ASCII_LOWER)
+
+
+def entry_size(key, label):
+    return sys.getsizeof(key) + sys.getsizeof(label) + ENTRY_OVERHEAD
+
+
+def max_bytes():
+    return getattr(settings, "API_AUTOCOMPLETE_MAX_BYTES", 256 * 1024 * 1024)
+
+
+def catalog_size(using="default"):
+    """Books plus authors, with the books read from the per-year counters
+    rather than counted
+    """
+    books = BookYearCount.objects.using(using).aggregate(n=Sum("book_count"))["n"] or 0
+    return books + Author.objects.using(using).count()
+
+
+# Case-insensitive prefix index over book titles and author names: a sorted
+# array of normalized labels searched with bisect, plus a parallel array of
+# (kind, id, label) entries. A lookup is one binary search and a short walk,
+# with no database access. Writers (signals, rebuilds) take the lock; a
+# rebuild prepares new arrays and swaps them in at once, then replays the
+# writes that arrived while it was reading rows its snapshot may predate.
+class PrefixIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = []
+        self.entries = []
+        # (kind, id) -> key, to find an entry again when it changes
+        self.positions = {}
+        self.size = 0
+        # Built and within the memory cap; otherwise lookups fall back to queries
+        self.ready = False
+        self.built_at = None
+        # A background rebuild is running (set and cleared under the lock)
+        self.building = False
+        # (kind, id, label or None for a removal) received during a build
+        self.pending = None
+        # catalog_size() when the catalog last failed to fit under the cap
+        self.oversized_at = None
+
+    def build(self, using="default"):
+        """Load every title and name; returns False (and leaves the index
+        disabled) when they would not fit in API_AUTOCOMPLETE_MAX_BYTES
+        """
+        with self.lock:
+            self.pending = []
+        try:
+            limit = max_bytes()
+            items, size = [], 0
+            sources = [
+                (BOOK, Book.objects.using(using).order_by().values_list("id", "title")),
+                (AUTHOR, Author.objects.using(using).order_by().values_list("id", "name")),
+            ]
+            for kind, rows in sources:
+                for pk, label in rows.iterator(chunk_size=BUILD_CHUNK_SIZE):
+                    key = normalize(label)
+                    size += entry_size(key, label)
+                    if size > limit:
+                        self.give_up(limit, using)
+                        return False
+                    items.append((key, kind, pk, label))
+            items.sort()
+
+            with self.lock:
+                self.keys = [item[0] for item in items]
+                self.entries = [item[1:] for item in items]
+                self.positions = {(kind, pk): key for key, kind, pk, _ in items}
+                self.size = size
+                for kind, pk, label in self.pending:
+                    if label is None:
+                        self._remove(kind, pk)
+                    else:
+                        self._put(kind, pk, label)
+                # The replayed writes count towards the cap too
+                self.ready = fits = self.size <= limit
+                self.built_at = time.monotonic()
+        finally:
+            with self.lock:
+                self.pending = None
+        if not fits:
+            self.give_up(limit, using)
+        else:
+            self.oversized_at = None
+        return fits
+
+    def give_up(self, limit, using):
+        logger.warning("autocomplete index exceeds %d bytes; using database lookups", limit)
+        self.disable()
+        self.oversized_at = catalog_size(using)
+
+    def still_oversized(self):
+        # A rebuild scans the whole catalog; skip it while the catalog has
+        # not shrunk since it last failed to fit
+        return self.oversized_at is not None and catalog_size() >= self.oversized_at
+
+    def disable(self):
+        with self.lock:
+            self.keys, self.entries, self.positions = [], [], {}
+            self.size = 0
+            self.ready = False
+            self.built_at = time.monotonic()
+
+    def is_stale(self):
+        max_age = getattr(settings, "API_AUTOCOMPLETE_MAX_AGE", 300)
+        return max_age is not None and time.monotonic() - self.built_at > max_age
+
+    def put(self, kind, pk, label):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((kind, pk, label))
+            if not self.ready:
+                return
+            self._put(kind, pk, label)
+            over = self.size > max_bytes()
+        if over:
+            logger.warning("autocomplete index outgrew %d bytes; using database lookups", max_bytes())
+            self.disable()
+
+    def remove(self, kind, pk):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((kind, pk, None))
+            if self.ready:
+                self._remove(kind, pk)
+
+    def _put(self, kind, pk, label):
+        self._remove(kind, pk)
+        key = normalize(label)
+        position = bisect.bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.entries.insert(position, (kind, pk, label))
+        self.positions[(kind, pk)] = key
+        self.size += entry_size(key, label)
+
+    def _remove(self, kind, pk):
+        key = self.positions.pop((kind, pk), None)
+        if key is None:
+            return
+        position = bisect.bisect_left(self.keys, key)
+        while self.keys[position] == key:
+            if self.entries[position][:2] == (kind, pk):
+                self.size -= entry_size(key, self.entries[position][2])
+                del self.keys[position]
+                del self.entries[position]
+                return
+            position += 1
+
+    def lookup(self, prefix, limit):
+        """Up to `limit` (kind, id, label) entries starting with `prefix`, in
+        case-insensitive label order
+        """
+        key = normalize(prefix)
+        with self.lock:
+            position = bisect.bisect_left(self.keys, key)
+            end = min(position + limit, len(self.keys))
+            matches = []
+            while position < end and self.keys[position].startswith(key):
+                matches.append(self.entries[position])
+                position += 1
+        return matches
+
+
+index = PrefixIndex()
+
+
+def warm():
+    """Build the index now (server startup); failures leave the fallback on"""
+    if not getattr(settings, "API_AUTOCOMPLETE_INDEX", True):
+        return
+    try:
+        if index.still_oversized():
+            # Wait another API_AUTOCOMPLETE_MAX_AGE before looking again
+            index.disable()
+            return
+        index.build()
+    except DatabaseError:
+        # e.g. not migrated yet: answer from the database and retry later
+        logger.exception("autocomplete index build failed; using database lookups")
+        index.disable()
+
+
+def _rebuild():
+    try:
+        warm()
+    finally:
+        with index.lock:
+            index.building = False
+        connections.close_all()
+
+
+def refresh():
+    # Writes from other processes (and raw-SQL commands) only reach this
+    # process's index through a periodic rebuild, done in the background
+    # while the current index keeps answering
+    with index.lock:
+        if index.building:
+            return
+        index.building = True
+    threading.Thread(target=_rebuild, name="autocomplete-rebuild", daemon=True).start()
+
+
+def suggest(prefix, limit):
+    """([{"type", "id", "label"}, ...], source) with source "index" or "database" """
+    if getattr(settings, "API_AUTOCOMPLETE_INDEX", True):
+        if index.built_at is None:
+            # Not warmed at startup (e.g. runserver autoreload, tests)
+            warm()
+        elif index.is_stale():
+            refresh()
+        if index.ready:
+            matches = index.lookup(prefix, limit)
+            return [{"type": kind, "id": pk, "label": label} for kind, pk, label in matches], "index"
+    return database_suggestions(prefix, limit), "database"
+
+
+def prefix_range(field, prefix):
+    bounds = {f"{field}__gte": prefix}
+    upper = prefix_upper_bound(prefix)
+    if upper is not None:
+        bounds[f"{field}__lt"] = upper
+    return Q(**bounds)
+
+
+def database_suggestions(prefix, limit):
+    # Seeks on the lower(title) / lower(name) indexes, in the index's order
+    key = normalize(prefix)
+    matches = []
+    for kind, model, field in ((BOOK, Book, "title"), (AUTHOR, Author, "name")):
+        rows = (
+            model.objects.annotate(label_key=Lower(field)).filter(prefix_range("label_key", key))
+            .order_by("label_key", "id").values_list("id", field)[:limit]
+        )
+        matches += [(kind, pk, label) for pk, label in rows]
+    matches.sort(key=lambda match: (normalize(match[2]), match[0], match[1]))
+    return [{"type": kind, "id": pk, "label": label} for kind, pk, label in matches[:limit]]
+
+
+def index_after_commit(kind, items):
+    """Apply (id, label) changes once the writing transaction commits"""
+    items = list(items)
+    transaction.on_commit(lambda: [index.put(kind, pk, label) for pk, label in items])
+
+
+def unindex_after_commit(kind, pk):
+    transaction.on_commit(lambda: index.remove(kind, pk))
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+
+# In-process load driver shared by the benchmark_api command: each route is
+# called `requests` times from `concurrency` workers through the WSGI (test
+# Client, one thread per worker) or ASGI (AsyncClient, one task per worker)
+# handler, without any network in between.
+#
+# advanced-api-project/api/benchmark.py and api_project/api/benchmark.py are
+# two copies of this module, since the projects share no package; keep them
+# identical.
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    # build(i) -> (path, payload or None) for the i-th request
+    build: Callable[[int], tuple]
+    authenticated: bool = False
+    headers: dict = field(default_factory=dict)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    rank = max(int(round(pct / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def _send(client, route, i):
+    path, payload = route.build(i)
+    kwargs = {}
+    if payload is not None:
+        kwargs = {"data": json.dumps(payload), "content_type": "application/json"}
+    response = getattr(client, route.method.lower())(path, **kwargs)
+    if response.streaming:
+        # Streamed bodies are produced while read; time and count that too
+        b"".join(response.streaming_content)
+    return response
+
+
+def probe(route, headers):
+    """One sequential request: status, SQL query count and peak Python memory"""
+    client = Client(headers=headers, raise_request_exception=False)
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as ctx:
+            response = _send(client, route, 0)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return response.status_code, len(ctx.captured_queries), peak
+
+
+def run_wsgi(route, requests, concurrency, headers):
+    def worker(indexes):
+        client = Client(headers=headers, raise_request_exception=False)
+        timings = []
+        try:
+            for i in indexes:
+                start = time.perf_counter()
+                response = _send(client, route, i)
+                timings.append((time.perf_counter() - start, response.status_code))
+        finally:
+            if concurrency > 1:
+                connections.close_all()
+        return timings
+
+    batches = [range(worker_id + 1, requests + 1, concurrency) for worker_id in range(concurrency)]
+    start = time.perf_counter()
+    if concurrency == 1:
+        results = [worker(batches[0])]
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(worker, batches))
+    return time.perf_counter() - start, [timing for batch in results for timing in batch]
+
+
+def run_asgi(route, requests, concurrency, headers):
+    async def worker(indexes):
+        # Client-level headers never reach the ASGI scope; send them per request
+        client = AsyncClient(raise_request_exception=False)
+        timings = []
+        for i in indexes:
+            path, payload = route.build(i)
+            kwargs = {"headers": headers}
+            if payload is not None:
+                kwargs.update(data=json.dumps(payload), content_type="application/json")
+            start = time.perf_counter()
+            response = await getattr(client, route.method.lower())(path, **kwargs)
+            if response.streaming:
+                # Like the ASGI handler, which reads sync iterators in a thread
+                async for _ in response:
+                    pass
+            timings.append((time.perf_counter() - start, response.status_code))
+        return timings
+
+    async def main():
+        batches = [range(worker_id + 1, requests + 1, concurrency) for worker_id in range(concurrency)]
+        return await asyncio.gather(*(worker(batch) for batch in batches))
+
+    start = time.perf_counter()
+    results = asyncio.run(main())
+    return time.perf_counter() - start, [timing for batch in results for timing in batch]
+
+
+def measure(route, requests, concurrency, interface, headers):
+    # Failed requests are counted, not logged one by one
+    logger = logging.getLogger("django.request")
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    try:
+        status, queries, peak = probe(route, headers)
+        runner = run_asgi if interface == "asgi" else run_wsgi
+        elapsed, timings = runner(route, requests, concurrency, headers)
+    finally:
+        logger.setLevel(level)
+    latencies = sorted(seconds * 1000 for seconds, _ in timings)
+    errors = sum(1 for _, code in timings if code >= 400)
+    return {
+        "route": route.name,
+        "method": route.method,
+        "interface": interface,
+        "requests": len(timings),
+        "concurrency": concurrency,
+        "status": status,
+        "errors": errors,
+        "throughput_rps": round(len(timings) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 3) if latencies else None,
+        "queries": queries,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
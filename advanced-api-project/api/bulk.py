@@ -0,0 +1,28 @@
+from django.utils import timezone
+
+
+def insert_rows(connection, model, field_names, rows):
+    """INSERT `rows` (tuples in `field_names` order) with one executemany,
+    skipping model instances and per-value preparation, so values must
+    already be in database form (strings, numbers, foreign key ids). Models
+    with an `updated_at` column get it stamped with the current time, and
+    other omitted columns with a default (e.g. counters) get the default.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    stamp = ()
+    if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+        stamp_field = model._meta.get_field("updated_at")
+        fields.append(stamp_field)
+        stamp = (stamp_field.get_db_prep_save(timezone.now(), connection),)
+    for field in model._meta.concrete_fields:
+        if field not in fields and not field.primary_key and field.has_default():
+            fields.append(field)
+            stamp += (field.get_db_prep_save(field.get_default(), connection),)
+    quote = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        quote(model._meta.db_table),
+        ", ".join(quote(field.column) for field in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [row + stamp for row in rows] if stamp else rows)
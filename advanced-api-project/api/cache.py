@@ -0,0 +1,154 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .replicas import reading_from_replica
+
+# Generation scopes: every book list depends on the whole catalog, a book
+# detail on that book and on BOOKS, which only changes when books are
+# deleted wholesale without per-row signals.
+CATALOG = "catalog"
+BOOKS = "books"
+
+# Headers set by the view that must come back with a cached body
+CACHED_HEADERS = ("Content-Type", "Vary", "Allow", "ETag", "Last-Modified")
+
+
+def get_cache():
+    return caches[getattr(settings, "API_CACHE_ALIAS", "default")]
+
+
+def book_scope(pk):
+    return f"book:{pk}"
+
+
+def _generation_key(scope):
+    return f"api:gen:{scope}"
+
+
+def _bumped_at_key(scope):
+    return f"api:gen-at:{scope}"
+
+
+def get_generations(scopes):
+    """Current generation of each scope; missing counters are started fresh"""
+    cache = get_cache()
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Seeded from the clock so an evicted counter never reuses a
+            # generation that still has responses cached under it
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump_generations(scopes):
+    """Invalidate every response cached under these scopes"""
+    cache = get_cache()
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+    cache.set_many({_bumped_at_key(scope): time.time() for scope in scopes}, None)
+
+
+def may_store(scopes):
+    """Whether rows read now may be cached under the scopes' current generations.
+
+    The primary's rows always may. A replica can lag by up to
+    API_READ_YOUR_WRITES_WINDOW seconds (the same bound that pins writers to
+    the primary), so its rows are only known to match the current generation
+    once that long has passed since the last bump.
+    """
+    if not reading_from_replica():
+        return True
+    lag = getattr(settings, "API_READ_YOUR_WRITES_WINDOW", 5)
+    now = time.time()
+    stamps = get_cache().get_many([_bumped_at_key(scope) for scope in scopes])
+    return all(now - stamp >= lag for stamp in stamps.values())
+
+
+def invalidate(scopes):
+    # Bump now so this transaction stops seeing stale entries, and again on
+    # commit so readers that cached the old rows in between are dropped too.
+    bump_generations(scopes)
+    transaction.on_commit(lambda: bump_generations(scopes))
+
+
+# Caches rendered JSON GET responses. The key combines the generations of the
+# view's scopes with the normalized request, so a write only has to bump a
+# counter to make every stale entry unreachable.
+class CachedResponseMixin:
+    cache_timeout = None
+
+    def get_cache_scopes(self):
+        return [CATALOG]
+
+    def get_cache_variant(self, request):
+        # Part of the key that depends on who is asking
+        return "auth" if request.user and request.user.is_authenticated else "anon"
+
+    def get_cache_key(self, request):
+        if not getattr(settings, "API_CACHE_ENABLED", True):
+            return None
+        if type(request.accepted_renderer) is not JSONRenderer:
+            return None
+        query = "&".join(
+            f"{name}={value}"
+            for name, values in sorted(request.query_params.lists())
+            for value in values
+        )
+        raw = "|".join([
+            request.build_absolute_uri(request.path),
+            query,
+            request.accepted_media_type,
+            self.get_cache_variant(request),
+            *(str(generation) for generation in get_generations(self.get_cache_scopes())),
+        ])
+        return "api:resp:" + hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, request, *args, **kwargs):
+        self.response_cache_key = self.get_cache_key(request)
+        if self.response_cache_key:
+            cached = get_cache().get(self.response_cache_key)
+            if cached is not None:
+                content, headers = cached
+                response = HttpResponse(content, headers=headers)
+                response["X-Cache"] = "HIT"
+                # Answer conditional requests from the cached validators
+                return get_conditional_response(
+                    request,
+                    etag=headers.get("ETag"),
+                    last_modified=parse_http_date_safe(headers.get("Last-Modified")),
+                    response=response,
+                )
+        return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "response_cache_key", None)
+        # A lagging replica could store old rows under the current generation
+        if key and isinstance(response, Response) and response.status_code == 200 \
+                and may_store(self.get_cache_scopes()):
+            response["X-Cache"] = "MISS"
+            response.add_post_render_callback(lambda rendered: self.store_response(key, rendered))
+        return response
+
+    def store_response(self, key, response):
+        headers = {name: response[name] for name in CACHED_HEADERS if name in response}
+        timeout = self.cache_timeout
+        if timeout is None:
+            timeout = getattr(settings, "API_CACHE_TIMEOUT", 300)
+        get_cache().set(key, (response.content, headers), timeout)
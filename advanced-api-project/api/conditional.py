@@ -0,0 +1,81 @@
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .cache import CATALOG, get_generations
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest())
+
+
+def book_validators(queryset, pk, media_type, fields=None):
+    """(etag, last_modified) for one book, read from its `updated_at` only.
+    Each media type and fieldset is a different representation, so gets its
+    own ETag.
+    """
+    updated_at = queryset.filter(pk=pk).values_list("updated_at", flat=True).first()
+    if updated_at is None:
+        return None, None
+    variant = () if fields is None else (",".join(fields),)
+    return make_etag("book", pk, media_type, updated_at.isoformat(), *variant), updated_at
+
+
+def list_validators(query_string, media_type):
+    """(etag, last_modified) for a filtered list, without touching the database.
+
+    Every book or author write bumps the catalog generation (see api.cache),
+    so it stands in for the list's contents. Aggregating the matching rows
+    instead would cost a scan of the whole filtered catalog on every page.
+    There is no cheap Last-Modified, so lists only get an ETag. JSON, NDJSON
+    and the browsable page of the same list get different ETags.
+    """
+    generation, = get_generations([CATALOG])
+    return make_etag("books", query_string, media_type, generation), None
+
+
+def set_validators(response, etag, last_modified):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+def evaluate_preconditions(request, etag, last_modified):
+    """304/412 response when the request's conditional headers say so, else None"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    # The placeholder lets a 304 carry the validators back to the client
+    placeholder = set_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp, response=placeholder
+    )
+    return None if response is placeholder else response
+
+
+# Conditional GET for the book read views. Validators are computed without
+# loading or serializing any rows, so a matching If-None-Match /
+# If-Modified-Since is answered with 304 before the view does any real work.
+class ConditionalGetMixin:
+
+    def get_validators(self, request):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        if etag:
+            not_modified = evaluate_preconditions(request, etag, last_modified)
+            if not_modified is not None:
+                return self.vary_on_accept(not_modified)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return self.vary_on_accept(response)
+
+    def vary_on_accept(self, response):
+        # The ETag depends on the negotiated media type
+        if len(self.renderer_classes) > 1:
+            patch_vary_headers(response, ["Accept"])
+        return response
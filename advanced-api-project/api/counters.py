@@ -0,0 +1,114 @@
+from collections import Counter, defaultdict
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Author, Book, BookYearCount
+
+# Ids per UPDATE ... WHERE id IN (...), under SQLite's bound parameter limit
+CHUNK_SIZE = 900
+
+
+def book_deltas(added=(), removed=()):
+    """Per-author and per-year count changes for (author_id, year) pairs"""
+    authors, years = Counter(), Counter()
+    for author_id, year in added:
+        authors[author_id] += 1
+        years[year] += 1
+    for author_id, year in removed:
+        authors[author_id] -= 1
+        years[year] -= 1
+    return authors, years
+
+
+def apply_deltas(authors, years):
+    """Add the deltas with F() updates; call inside the write's transaction so
+    the counters commit (or roll back) with the books themselves.
+    """
+    for delta, ids in _group_by_delta(authors):
+        Author.objects.filter(pk__in=ids).update(book_count=F('book_count') + delta)
+    new_years = [year for year, delta in years.items() if delta]
+    if new_years:
+        BookYearCount.objects.bulk_create(
+            [BookYearCount(year=year) for year in new_years], ignore_conflicts=True
+        )
+    for delta, keys in _group_by_delta(years):
+        BookYearCount.objects.filter(year__in=keys).update(book_count=F('book_count') + delta)
+
+
+def _group_by_delta(deltas):
+    # Most changes share a delta (+1, -1), so one UPDATE covers many rows
+    groups = defaultdict(list)
+    for key, delta in deltas.items():
+        if delta and key is not None:
+            groups[delta].append(key)
+    for delta, keys in groups.items():
+        for start in range(0, len(keys), CHUNK_SIZE):
+            yield delta, keys[start:start + CHUNK_SIZE]
+
+
+def counted_as(book):
+    return (book.author_id, book.publication_year)
+
+
+def book_created(book):
+    apply_deltas(*book_deltas(added=[counted_as(book)]))
+    book._counted = counted_as(book)
+
+
+def book_changed(book, before):
+    """Move the book's counts from `before` (author_id, year) to its current values"""
+    after = counted_as(book)
+    if before != after:
+        apply_deltas(*book_deltas(added=[after], removed=[before]))
+    book._counted = after
+
+
+def book_deleted(book):
+    apply_deltas(*book_deltas(removed=[getattr(book, '_counted', None) or counted_as(book)]))
+
+
+def books_changed(books):
+    """Counter updates for instances loaded from the database and then
+    modified in memory (e.g. before bulk_update)
+    """
+    before, after = [], []
+    for book in books:
+        if book._counted != counted_as(book):
+            before.append(book._counted)
+            after.append(counted_as(book))
+            book._counted = counted_as(book)
+    if after:
+        apply_deltas(*book_deltas(added=after, removed=before))
+
+
+def recount(using=DEFAULT_DB_ALIAS):
+    """Recompute every counter from api_book; returns (authors, years) fixed"""
+    books, years = Book.objects.using(using), BookYearCount.objects.using(using)
+    actual = Coalesce(
+        Subquery(
+            books.filter(author=OuterRef('pk'))
+            .order_by().values('author').annotate(n=Count('id')).values('n')
+        ),
+        Value(0),
+    )
+    authors = Author.objects.using(using)
+    fixed_authors = authors.annotate(actual=actual).exclude(book_count=F('actual')).count()
+    if fixed_authors:
+        authors.update(book_count=actual)
+
+    stored = dict(years.values_list('year', 'book_count'))
+    counted = dict(
+        books.order_by().values('publication_year')
+        .annotate(n=Count('id')).values_list('publication_year', 'n')
+    )
+    fixed_years = sum(
+        stored.get(year, 0) != counted.get(year, 0) for year in stored.keys() | counted.keys()
+    )
+    if fixed_years:
+        years.all().delete()
+        years.bulk_create(
+            [BookYearCount(year=year, book_count=n) for year, n in counted.items()]
+        )
+    return fixed_authors, fixed_years
@@ -0,0 +1,64 @@
+import csv
+import io
+
+from .renderers import NDJSONRenderer
+
+# Flat columns for analytics: the author's name travels with every book
+EXPORT_COLUMNS = ("id", "title", "publication_year", "author", "author_name", "updated_at")
+# Rows encoded per yielded chunk; fewer, larger writes to the socket or file
+ROWS_PER_CHUNK = 1000
+
+
+def export_queryset(queryset):
+    return queryset.select_related("author").only(
+        "id", "title", "publication_year", "updated_at", "author__name"
+    )
+
+
+def export_rows(queryset, chunk_size=2000):
+    """Dicts in EXPORT_COLUMNS order, fetched `chunk_size` rows at a time"""
+    for book in export_queryset(queryset).iterator(chunk_size=chunk_size):
+        # Same representation as the API's DateTimeField
+        updated_at = book.updated_at.isoformat()
+        if updated_at.endswith("+00:00"):
+            updated_at = updated_at[:-6] + "Z"
+        yield {
+            "id": book.id,
+            "title": book.title,
+            "publication_year": book.publication_year,
+            "author": book.author_id,
+            "author_name": book.author.name,
+            "updated_at": updated_at,
+        }
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row.values())
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_jsonl(rows):
+    encode = NDJSONRenderer().encode
+    chunk = []
+    for row in rows:
+        chunk.append(encode(row))
+        if len(chunk) == ROWS_PER_CHUNK:
+            yield b"".join(chunk)
+            chunk = []
+    yield b"".join(chunk)
+
+
+ENCODERS = {"csv": iter_csv, "jsonl": iter_jsonl}
+
+
+def encode_rows(fmt, rows):
+    """Byte chunks of `rows` as CSV (with a header) or JSON lines"""
+    return ENCODERS[fmt](rows)
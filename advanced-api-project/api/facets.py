@@ -0,0 +1,116 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+from .cache import CATALOG, get_cache, get_generations, may_store
+from .models import Author, BookYearCount
+
+FACETS_PARAM = "facets"
+
+# Query parameters that change the page or its presentation, not which books
+# match; they are left out of the filter signature so every page, ordering
+# and format of the same filter shares the cached counts.
+NON_FILTER_PARAMS = {"cursor", "page_size", "ordering", "format", FACETS_PARAM}
+
+
+def filter_signature(query_params):
+    return "&".join(
+        f"{name}={value}"
+        for name, values in sorted(query_params.lists())
+        if name not in NON_FILTER_PARAMS
+        for value in values
+    )
+
+
+def publication_year_facet(queryset, limit, unfiltered):
+    if unfiltered:
+        # The whole catalog: read the per-year counters instead of grouping api_book
+        rows = (
+            BookYearCount.objects.using(queryset.db).filter(book_count__gt=0)
+            .order_by("-book_count", "year").values_list("year", "book_count")
+        )
+    else:
+        rows = (
+            queryset.order_by().values("publication_year").annotate(n=Count("id"))
+            .order_by("-n", "publication_year").values_list("publication_year", "n")
+        )
+    return [{"value": year, "count": count} for year, count in rows[:limit]]
+
+
+def author_facet(queryset, limit, unfiltered):
+    if unfiltered:
+        rows = (
+            Author.objects.using(queryset.db).filter(book_count__gt=0)
+            .order_by("-book_count", "id").values_list("id", "name", "book_count")
+        )
+    else:
+        rows = (
+            queryset.order_by().values("author", "author__name").annotate(n=Count("id"))
+            .order_by("-n", "author").values_list("author", "author__name", "n")
+        )
+    return [{"value": pk, "label": name, "count": count} for pk, name, count in rows[:limit]]
+
+
+# Facet name -> function(filtered queryset, limit, unfiltered) returning
+# [{"value": ..., "count": ...}, ...] ordered by count, highest first
+FACETS = {
+    "publication_year": publication_year_facet,
+    "author": author_facet,
+}
+
+
+# Opt-in facet counts for list views: ?facets=publication_year,author adds a
+# "facets" object to the paginated envelope, counted over the filtered (not
+# paginated) queryset with one grouped query per facet. Counts are cached per
+# filter signature and facet under the catalog generation, so paging through
+# the results, or asking for another facet, reuses what is already counted.
+class FacetMixin:
+    facet_limit = 50
+
+    def get_requested_facets(self):
+        value = self.request.query_params.get(FACETS_PARAM)
+        if not value:
+            return []
+        names = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+        unknown = [name for name in names if name not in FACETS]
+        if unknown:
+            raise ValidationError({
+                FACETS_PARAM: [f"Unknown facet {name!r}; choose from {', '.join(FACETS)}." for name in unknown]
+            })
+        return names
+
+    def get_facets(self, names):
+        queryset = self.filter_queryset(self.get_queryset())
+        signature = filter_signature(self.request.query_params)
+        use_cache = getattr(settings, "API_CACHE_ENABLED", True)
+        facets = {}
+        for name in names:
+            key = self.get_facet_cache_key(name, signature) if use_cache else None
+            counts = get_cache().get(key) if key else None
+            if counts is None:
+                counts = FACETS[name](queryset, self.facet_limit, unfiltered=not signature)
+                # A lagging replica could store old counts under the current generation
+                if key and may_store([CATALOG]):
+                    get_cache().set(key, counts, getattr(settings, "API_CACHE_TIMEOUT", 300))
+            facets[name] = counts
+        return facets
+
+    def get_facet_cache_key(self, name, signature):
+        raw = json.dumps([
+            self.request.path, name, self.facet_limit, signature, *get_generations([CATALOG]),
+        ])
+        return "api:facets:" + hashlib.sha256(raw.encode()).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Reject unknown facets before any query runs
+        self.requested_facets = self.get_requested_facets()
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.requested_facets:
+            response.data[FACETS_PARAM] = self.get_facets(self.requested_facets)
+        return response
@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+
+from .timing import phase
+
+# Model fields whose DRF representation is the database value unchanged
+PASSTHROUGH_FIELDS = (models.IntegerField, models.CharField, models.TextField, models.BooleanField)
+
+
+@lru_cache(maxsize=None)
+def compile_field_plan(serializer_class):
+    """((output key, column), ...) for a serializer whose output is a plain
+    projection of model columns, or None when it needs the full DRF machinery
+    (declared fields, custom to_representation, choices, dates, ...).
+    """
+    meta = getattr(serializer_class, "Meta", None)
+    fields = getattr(meta, "fields", None)
+    if not isinstance(fields, (list, tuple)):
+        return None
+    if serializer_class._declared_fields:
+        return None
+    if serializer_class.to_representation is not serializers.ModelSerializer.to_representation:
+        return None
+    for options in getattr(meta, "extra_kwargs", {}).values():
+        if "source" in options or options.get("write_only"):
+            return None
+
+    plan = []
+    for name in fields:
+        try:
+            field = meta.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if field.is_relation:
+            # Foreign keys render as the related primary key
+            if not (field.many_to_one and field.concrete):
+                return None
+            if not isinstance(field.target_field, models.IntegerField):
+                return None
+        elif not isinstance(field, PASSTHROUGH_FIELDS) or field.choices:
+            return None
+        plan.append((name, field.attname))
+    return tuple(plan)
+
+
+def plan_columns(plan, queryset):
+    # Annotations (e.g. search_rank) stay selected so pagination can seek on them
+    return [column for _, column in plan] + list(queryset.query.annotations)
+
+
+def build_rows(plan, rows):
+    with phase("serialize"):
+        return [{key: row[column] for key, column in plan} for row in rows]
+
+
+# Opt-in read path (API_FAST_SERIALIZATION) that fetches `values()` rows and
+# builds the response dicts straight from the serializer's field plan,
+# skipping model instantiation and per-field to_representation. The JSON is
+# byte-identical to the regular path; serializers the plan cannot express
+# fall back to it automatically.
+class FastSerializationMixin:
+
+    def get_field_plan(self):
+        if not getattr(settings, "API_FAST_SERIALIZATION", False):
+            return None
+        return compile_field_plan(self.get_serializer_class())
+
+    def fast_values(self, plan, queryset):
+        return queryset.values(*plan_columns(plan, queryset))
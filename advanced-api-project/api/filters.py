@@ -0,0 +1,46 @@
+import sys
+
+from django_filters import rest_framework as filters
+
+from .models import Book
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with `prefix`,
+    or None when there is none (a prefix of only the maximum code point)
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+# Book list filters. Every lookup compiles to a predicate the indexes in
+# Book.Meta can seek on:
+#   publication_year / __gte / __lte  -> range on book_year_title_idx
+#   author / author__in              -> book_author_year_idx
+#   title / title__startswith         -> range on book_title_idx
+# SQLite runs startswith as a LIKE, which is case-insensitive and so cannot
+# use the (case-sensitive) title index; the explicit range bounds the scan and
+# the LIKE only rechecks the rows inside it.
+class BookFilter(filters.FilterSet):
+    publication_year__gte = filters.NumberFilter(field_name='publication_year', lookup_expr='gte')
+    publication_year__lte = filters.NumberFilter(field_name='publication_year', lookup_expr='lte')
+    # ?author__in=1,2,3; plain ids, so no per-author existence query
+    author__in = NumberInFilter(field_name='author', lookup_expr='in')
+    title__startswith = filters.CharFilter(method='filter_title_startswith')
+
+    class Meta:
+        model = Book
+        fields = ['title', 'author', 'publication_year']
+
+    def filter_title_startswith(self, queryset, name, value):
+        bounds = {'title__gte': value}
+        upper = prefix_upper_bound(value)
+        if upper is not None:
+            bounds['title__lt'] = upper
+        return queryset.filter(title__startswith=value, **bounds)
@@ -0,0 +1,111 @@
+# Schema for the FTS5 index over book title and author name (SQLite only).
+# Triggers keep it in sync on every write path (ORM, admin, raw SQL); they
+# must be dropped around migrations that rebuild api_book or api_author.
+
+from contextlib import contextmanager
+
+FTS_TABLE = "api_book_fts"
+
+CREATE_TABLE = f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, author_name, tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+POPULATE = f"""
+    INSERT INTO {FTS_TABLE} (rowid, title, author_name)
+    SELECT b.id, b.title, a.name FROM api_book b JOIN api_author a ON a.id = b.author_id
+"""
+
+TRIGGERS = {
+    "api_book_fts_insert": f"""
+        CREATE TRIGGER api_book_fts_insert AFTER INSERT ON api_book BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, title, author_name)
+            VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+        END
+    """,
+    "api_book_fts_update": f"""
+        CREATE TRIGGER api_book_fts_update AFTER UPDATE OF id, title, author_id ON api_book BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+            INSERT INTO {FTS_TABLE} (rowid, title, author_name)
+            VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+        END
+    """,
+    "api_book_fts_delete": f"""
+        CREATE TRIGGER api_book_fts_delete AFTER DELETE ON api_book BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        END
+    """,
+    "api_author_fts_update": f"""
+        CREATE TRIGGER api_author_fts_update AFTER UPDATE OF name ON api_author BEGIN
+            UPDATE {FTS_TABLE} SET author_name = new.name
+            WHERE rowid IN (SELECT id FROM api_book WHERE author_id = new.id);
+        END
+    """,
+}
+
+
+@contextmanager
+def deferred_book_indexing(connection):
+    """Inside a transaction: suspend the per-row insert trigger and index the
+    books added in the block with one INSERT ... SELECT on the way out.
+    """
+    if not has_fts_table(connection):
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM api_book")
+        last_id = cursor.fetchone()[0]
+        cursor.execute("DROP TRIGGER IF EXISTS api_book_fts_insert")
+    yield
+    with connection.cursor() as cursor:
+        cursor.execute(POPULATE + " WHERE b.id > %s", [last_id])
+        cursor.execute(TRIGGERS["api_book_fts_insert"])
+
+
+def has_fts5(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+
+def has_fts_table(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def install(schema_editor):
+    # Other databases (or SQLite builds without FTS5) keep the LIKE search
+    if not has_fts5(schema_editor.connection):
+        return
+    schema_editor.execute(CREATE_TABLE)
+    create_triggers(schema_editor)
+    schema_editor.execute(POPULATE)
+
+
+def uninstall(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    drop_triggers(schema_editor)
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def create_triggers(schema_editor):
+    if not has_fts_table(schema_editor.connection):
+        return
+    for sql in TRIGGERS.values():
+        schema_editor.execute(sql)
+
+
+def drop_triggers(schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for name in TRIGGERS:
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
@@ -0,0 +1,208 @@
+import json
+import os
+import platform
+import random
+import resource
+import tempfile
+import time
+from urllib.parse import urlencode
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import NoReverseMatch, reverse
+from rest_framework.authtoken.models import Token
+
+from api import counters
+from api.benchmark import Route, measure
+from api.models import Author, Book
+
+WORDS = ["river", "arrow", "god", "blood", "sun", "night", "house", "road", "city", "song",
+         "season", "stone", "fire", "water", "child", "king", "dream", "war", "home", "sky"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed books at several scales and drive every book/author API route "
+        "in-process, reporting throughput, latency percentiles, SQL query "
+        "counts and peak memory as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--interface", choices=["wsgi", "asgi"], default="wsgi")
+        parser.add_argument("--routes", nargs="+", help="Only run these route names")
+        parser.add_argument("--with-cache", action="store_true",
+                            help="Keep the response cache on (off by default so every request hits the database)")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+        parser.add_argument("--database", help="SQLite file for the scratch database (default: a temp file)")
+        parser.add_argument("--use-current-db", action="store_true",
+                            help="Seed into the configured database instead of a scratch copy")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1")
+        self.random = random.Random(options["seed"])
+
+        old_name = None
+        if not options["use_current_db"]:
+            # Benchmark data never touches the real database
+            old_name = connection.settings_dict["NAME"]
+            test_name = options["database"] or os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = test_name
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            overrides = {"ALLOWED_HOSTS": ["testserver"]}
+            if not options["with_cache"]:
+                overrides["API_CACHE_ENABLED"] = False
+            with override_settings(**overrides):
+                report = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        body = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(body + "\n")
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(body)
+
+    def run(self, options):
+        user, _ = get_user_model().objects.get_or_create(username="benchmark")
+        token, _ = Token.objects.get_or_create(user=user)
+        auth_headers = {"Authorization": f"Token {token.key}"}
+
+        results, seeded = [], Book.objects.count()
+        for scale in sorted(options["scales"]):
+            started = time.perf_counter()
+            self.seed(seeded, scale)
+            seeded = max(seeded, scale)
+            seed_seconds = time.perf_counter() - started
+            self.stderr.write(f"{scale} books seeded in {seed_seconds:.1f}s")
+
+            for route in self.routes(options["requests"]):
+                if options["routes"] and route.name not in options["routes"]:
+                    continue
+                result = measure(
+                    route,
+                    options["requests"],
+                    options["concurrency"],
+                    options["interface"],
+                    auth_headers if route.authenticated else {},
+                )
+                result["scale"] = scale
+                results.append(result)
+                self.stderr.write(
+                    f"  {route.name:<28} {result['throughput_rps']:>9} req/s  "
+                    f"p95 {result['p95_ms']} ms  queries {result['queries']}"
+                )
+
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "interface": options["interface"],
+                "concurrency": options["concurrency"],
+                "requests_per_route": options["requests"],
+                "response_cache": options["with_cache"],
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            },
+            "results": results,
+        }
+
+    def seed(self, start, stop, batch_size=10_000):
+        if stop <= start:
+            return
+        first_author = start // 20
+        authors = Author.objects.bulk_create(
+            [Author(name=f"{self.random.choice(WORDS).title()} Author {i}")
+             for i in range(first_author, max(stop // 20, first_author + 1))]
+        )
+        for offset in range(start, stop, batch_size):
+            Book.objects.bulk_create([
+                Book(
+                    title=" ".join(self.random.choices(WORDS, k=3)).title(),
+                    publication_year=self.random.randint(1900, 2024),
+                    author=authors[i % len(authors)],
+                )
+                for i in range(offset, min(offset + batch_size, stop))
+            ])
+        # bulk_create skips the counter signals
+        counters.recount()
+
+    def routes(self, requests):
+        book_ids = list(Book.objects.order_by("id").values_list("id", flat=True)[:10_000])
+        author_ids = list(Author.objects.order_by("id").values_list("id", flat=True)[:1_000])
+        # Books set aside for the two delete routes (one per request, plus the probe)
+        doomed = list(Book.objects.order_by("-id").values_list("id", flat=True)[: 2 * (requests + 1)])
+        doomed, async_doomed = doomed[::2], doomed[1::2]
+        book = lambda i: book_ids[i % len(book_ids)]
+        author = lambda i: author_ids[i % len(author_ids)]
+        word = lambda i: WORDS[i % len(WORDS)]
+
+        def url(name, params=None, **kwargs):
+            path = reverse(name, kwargs=kwargs or None)
+            return f"{path}?{urlencode(params)}" if params else path
+
+        def new_book(i):
+            return {"title": f"Benchmark {i}", "publication_year": 2000, "author": author(i)}
+
+        routes = [
+            Route("book-list", "GET", lambda i: (url("book-list"), None)),
+            Route("book-list-ordered", "GET",
+                  lambda i: (url("book-list", {"ordering": "-publication_year"}), None)),
+            Route("book-list-filtered", "GET",
+                  lambda i: (url("book-list", {"publication_year": 1900 + i % 125}), None)),
+            Route("book-list-search", "GET", lambda i: (url("book-list", {"search": word(i)}), None)),
+            Route("book-detail", "GET", lambda i: (url("book-detail", pk=book(i)), None)),
+            # One publication year per request; the whole catalog would dwarf every other route
+            Route("book-export", "GET",
+                  lambda i: (url("book-export", {"publication_year": 1900 + i % 125}), None)),
+            Route("book-autocomplete", "GET",
+                  lambda i: (url("book-autocomplete", {"q": word(i)[:1 + i % 3]}), None)),
+            Route("book-create", "POST", lambda i: (url("book-create"), new_book(i)), authenticated=True),
+            Route("book-bulk-create", "POST",
+                  lambda i: (url("book-bulk-create"), [new_book(i * 100 + j) for j in range(100)]),
+                  authenticated=True),
+            Route("book-update", "PUT",
+                  lambda i: (url("book-update", pk=book(i)), new_book(i)), authenticated=True),
+            Route("book-bulk-update", "PATCH",
+                  lambda i: (url("book-bulk-update"),
+                             [{"id": book(i * 100 + j), "publication_year": 1990} for j in range(100)]),
+                  authenticated=True),
+            Route("book-delete", "DELETE",
+                  lambda i: (url("book-delete", pk=doomed[i % len(doomed)]), None), authenticated=True),
+            Route("author-list", "GET", lambda i: (url("author-list"), None)),
+            Route("author-detail", "GET", lambda i: (url("author-detail", pk=author(i)), None)),
+        ]
+
+        # Async twins, when mounted side by side (the builders resolve lazily,
+        # so check here)
+        try:
+            reverse("async-book-list")
+        except NoReverseMatch:
+            return routes
+        routes += [
+            Route("async-book-list", "GET", lambda i: (url("async-book-list"), None)),
+            Route("async-book-list-search", "GET",
+                  lambda i: (url("async-book-list", {"search": word(i)}), None)),
+            Route("async-book-detail", "GET", lambda i: (url("async-book-detail", pk=book(i)), None)),
+            Route("async-book-create", "POST",
+                  lambda i: (url("async-book-create"), new_book(i)), authenticated=True),
+            Route("async-book-update", "PUT",
+                  lambda i: (url("async-book-update", pk=book(i)), new_book(i)), authenticated=True),
+            Route("async-book-delete", "DELETE",
+                  lambda i: (url("async-book-delete", pk=async_doomed[i % len(async_doomed)]), None),
+                  authenticated=True),
+        ]
+        return routes
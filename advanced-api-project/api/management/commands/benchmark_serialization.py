@@ -0,0 +1,97 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.fastpath import build_rows, compile_field_plan
+from api.models import Author, Book
+from api.serializers import BookSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare BookSerializer with the values() fast path on N generated "
+        "books (inserted in a transaction that is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+        parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        results = []
+        try:
+            with transaction.atomic():
+                # Only the generated books (ids above the current max) are measured
+                last = Book.objects.order_by("-id").values_list("id", flat=True).first() or 0
+                queryset = Book.objects.filter(id__gt=last).order_by("id")
+                seeded = 0
+                for rows in sorted(options["rows"]):
+                    self.seed(seeded, rows)
+                    seeded = rows
+                    results.append(self.measure(queryset, rows, options["repeat"]))
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f"{result['rows']:>8} rows  serializer {result['serializer_s']:.3f}s  "
+                f"fast path {result['fast_path_s']:.3f}s  "
+                f"speedup x{result['speedup']:.1f}  identical={result['identical']}"
+            )
+
+    def seed(self, start, stop):
+        authors = Author.objects.bulk_create(
+            [Author(name=f"Author {i}") for i in range(start // 20, max(stop // 20, start // 20 + 1))]
+        )
+        Book.objects.bulk_create(
+            [
+                Book(
+                    title=f"Book {i}",
+                    publication_year=1900 + i % 120,
+                    author=authors[i % len(authors)],
+                )
+                for i in range(start, stop)
+            ],
+            batch_size=5000,
+        )
+
+    def measure(self, queryset, rows, repeat):
+        plan = compile_field_plan(BookSerializer)
+        columns = [column for _, column in plan]
+        renderer = JSONRenderer()
+
+        def regular():
+            return renderer.render(BookSerializer(queryset.all(), many=True).data)
+
+        def fast():
+            return renderer.render(build_rows(plan, queryset.values(*columns)))
+
+        timings = {}
+        for name, func in (("serializer", regular), ("fast_path", fast)):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                body = func()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = (best, body)
+
+        return {
+            "rows": rows,
+            "serializer_s": round(timings["serializer"][0], 4),
+            "fast_path_s": round(timings["fast_path"][0], 4),
+            "speedup": round(timings["serializer"][0] / timings["fast_path"][0], 2),
+            "identical": timings["serializer"][1] == timings["fast_path"][1],
+        }
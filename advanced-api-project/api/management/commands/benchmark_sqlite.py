@@ -0,0 +1,165 @@
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+SCHEMA = [
+    "CREATE TABLE book (id INTEGER PRIMARY KEY, title TEXT NOT NULL, "
+    "publication_year INTEGER NOT NULL, author_id INTEGER NOT NULL)",
+    "CREATE INDEX book_title ON book (title, id)",
+    "CREATE INDEX book_author_year ON book (author_id, publication_year)",
+]
+WORDS = ["river", "arrow", "god", "blood", "sun", "night", "house", "road", "city", "song"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SQLite read, write and mixed throughput with stock settings "
+        "and with the PRAGMAs / persistent connections configured in DATABASES"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each run")
+        parser.add_argument("--database", default="default", help="Alias whose OPTIONS are the tuned config")
+        parser.add_argument("--dir", help="Where to put the scratch databases (default: next to the real one)")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["threads"] < 1 or options["seconds"] <= 0:
+            raise CommandError("--rows, --threads and --seconds must be positive")
+        db = connections[options["database"]]
+        if db.vendor != "sqlite":
+            raise CommandError(f"{options['database']!r} is not a SQLite database")
+        db_options = db.settings_dict.get("OPTIONS", {})
+        tuned_init = [sql.strip() for sql in db_options.get("init_command", "").split(";") if sql.strip()]
+        tuned_begin = f"BEGIN {db_options.get('transaction_mode') or ''}".strip()
+
+        # (name, PRAGMAs per connection, BEGIN statement, reuse connections)
+        configs = [
+            ("stock, connection per request", [], "BEGIN", False),
+            ("tuned, connection per request", tuned_init, tuned_begin, False),
+            ("tuned, persistent connections", tuned_init, tuned_begin, True),
+        ]
+        workloads = ["read", "write", "mixed"]
+
+        # fsync cost depends on the disk, so measure on the one the database lives on
+        parent = options["dir"] or os.path.dirname(str(db.settings_dict["NAME"]))
+        workdir = tempfile.mkdtemp(dir=parent if parent and os.path.isdir(parent) else None)
+        try:
+            template = os.path.join(workdir, "template.sqlite3")
+            self.create_template(template, options["rows"])
+            results = []
+            for name, init, begin, persistent in configs:
+                for workload in workloads:
+                    # Fresh copy per run; journal mode is stored in the file
+                    path = os.path.join(workdir, "run.sqlite3")
+                    for suffix in ("", "-wal", "-shm"):
+                        if os.path.exists(path + suffix):
+                            os.remove(path + suffix)
+                    shutil.copy(template, path)
+                    result = self.run(path, workload, init, begin, persistent, options)
+                    results.append({"config": name, "workload": workload, **result})
+        finally:
+            shutil.rmtree(workdir)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"pragmas": tuned_init, "results": results}, indent=2))
+            return
+        self.stdout.write(f"Tuned PRAGMAs: {'; '.join(tuned_init) or '(none)'}")
+        self.stdout.write(f"{'config':<32}{'workload':<10}{'reads/s':>10}{'writes/s':>10}{'errors':>8}")
+        for result in results:
+            self.stdout.write(
+                f"{result['config']:<32}{result['workload']:<10}"
+                f"{result['reads_per_s']:>10,.0f}{result['writes_per_s']:>10,.0f}{result['errors']:>8}"
+            )
+
+    def create_template(self, path, rows):
+        rng = random.Random(0)
+        conn = sqlite3.connect(path, isolation_level=None)
+        for sql in SCHEMA:
+            conn.execute(sql)
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO book (title, publication_year, author_id) VALUES (?, ?, ?)",
+            (
+                (" ".join(rng.choices(WORDS, k=3)), rng.randint(1900, 2024), rng.randint(1, max(rows // 20, 1)))
+                for _ in range(rows)
+            ),
+        )
+        conn.execute("COMMIT")
+        conn.close()
+
+    def run(self, path, workload, init, begin, persistent, options):
+        rows, threads = options["rows"], options["threads"]
+        deadline = time.perf_counter() + options["seconds"]
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def connect():
+            conn = sqlite3.connect(path, timeout=20, isolation_level=None, check_same_thread=False)
+            for sql in init:
+                conn.execute(sql)
+            return conn
+
+        def read(conn, rng):
+            # A detail lookup plus one page of the title-ordered list
+            conn.execute("SELECT * FROM book WHERE id = ?", [rng.randint(1, rows)]).fetchall()
+            conn.execute(
+                "SELECT * FROM book WHERE title >= ? ORDER BY title, id LIMIT 20", [rng.choice(WORDS)]
+            ).fetchall()
+
+        def write(conn, rng):
+            conn.execute(begin)
+            conn.execute(
+                "INSERT INTO book (title, publication_year, author_id) VALUES (?, ?, ?)",
+                [rng.choice(WORDS), rng.randint(1900, 2024), rng.randint(1, rows)],
+            )
+            conn.execute("COMMIT")
+
+        def worker(index):
+            rng = random.Random(index)
+            # Mixed: one writer, the other threads read
+            kind = workload if workload != "mixed" else ("write" if index == 0 else "read")
+            operation = write if kind == "write" else read
+            local = {"reads": 0, "writes": 0, "errors": 0}
+            conn = connect() if persistent else None
+            while time.perf_counter() < deadline:
+                request_conn = conn or connect()
+                try:
+                    operation(request_conn, rng)
+                    local[kind + "s"] += 1
+                except sqlite3.OperationalError:
+                    local["errors"] += 1
+                    if request_conn.in_transaction:
+                        request_conn.execute("ROLLBACK")
+                finally:
+                    if conn is None:
+                        request_conn.close()
+            if conn is not None:
+                conn.close()
+            with lock:
+                for key, value in local.items():
+                    counts[key] += value
+
+        started = time.perf_counter()
+        count = max(threads, 2) if workload == "mixed" else threads
+        pool = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            "reads_per_s": round(counts["reads"] / elapsed, 1),
+            "writes_per_s": round(counts["writes"] / elapsed, 1),
+            "errors": counts["errors"],
+        }
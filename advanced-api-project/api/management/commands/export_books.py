@@ -0,0 +1,87 @@
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpRequest, QueryDict
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from api.export import ENCODERS, encode_rows, export_rows
+from api.views import BookExportView
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream the books matching the list endpoint's filter/search/ordering "
+        "parameters to a CSV or JSONL file (optionally gzipped) with constant memory"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("params", nargs="*", metavar="NAME=VALUE",
+                            help="Query parameters, as for /api/books/export/ (e.g. search=river)")
+        parser.add_argument("--output", default="-", help="File to write, or - for stdout")
+        parser.add_argument("--format", choices=sorted(ENCODERS), help="Default: from --output, else csv")
+        parser.add_argument("--gzip", action="store_true", help="Compress (implied by a .gz --output)")
+        parser.add_argument("--chunk-size", type=int, default=BookExportView.export_chunk_size)
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        compress = options["gzip"] or output.endswith(".gz")
+        fmt = options["format"] or self.format_from_name(output.removesuffix(".gz"))
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+
+        query = QueryDict(mutable=True)
+        for param in options["params"]:
+            name, sep, value = param.partition("=")
+            if not sep:
+                raise CommandError(f"Expected NAME=VALUE, got {param!r}")
+            query.appendlist(name, value)
+
+        # Filter exactly as the endpoint does
+        http_request = HttpRequest()
+        http_request.method = "GET"
+        http_request.GET = query
+        view = BookExportView(request=Request(http_request), format_kwarg=None, args=(), kwargs={})
+        try:
+            queryset = view.filter_queryset(view.get_queryset())
+        except ValidationError as exc:
+            errors = "; ".join(f"{name}: {' '.join(map(str, messages))}" for name, messages in exc.detail.items())
+            raise CommandError(f"Invalid parameters: {errors}")
+
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for count, row in enumerate(rows, start=1):
+                yield row
+
+        started = time.perf_counter()
+        chunks = encode_rows(fmt, counted(export_rows(queryset, options["chunk_size"])))
+        raw = sys.stdout.buffer if output == "-" else open(output, "wb")
+        stream = gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+        finally:
+            if compress:
+                # Writes the gzip trailer; the underlying file stays open
+                stream.close()
+            if raw is sys.stdout.buffer:
+                raw.flush()
+            else:
+                raw.close()
+
+        elapsed = time.perf_counter() - started
+        self.stderr.write(
+            f"Exported {count} books as {fmt}{' (gzip)' if compress else ''} "
+            f"in {elapsed:.1f}s ({count / elapsed if elapsed else 0:,.0f} rows/s)"
+        )
+
+    @staticmethod
+    def format_from_name(name):
+        for fmt in ENCODERS:
+            if name.endswith("." + fmt):
+                return fmt
+        return "jsonl" if name.endswith(".ndjson") else "csv"
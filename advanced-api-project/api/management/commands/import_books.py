@@ -0,0 +1,176 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework import serializers
+
+from api import counters, fts
+from api.bulk import insert_rows
+from api.cache import CATALOG, invalidate
+from api.models import Author, Book, ImportCheckpoint
+from api.serializers import BookSerializer
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+# SQLite's default limit on bound parameters per statement
+MAX_LOOKUP = 900
+
+
+class Rejected(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream books from a CSV or JSONL file (or stdin) into the catalog, "
+        "creating authors by name, in batches that can be resumed from a checkpoint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Records per transaction")
+        parser.add_argument("--checkpoint", help="Name to save progress under, with every committed batch")
+        parser.add_argument("--resume", action="store_true", help="Skip the records already in --checkpoint")
+        parser.add_argument("--rejects", help="Write rejected records here as JSONL")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or FORMATS.get(os.path.splitext(options["path"])[1].lower())
+        if fmt is None:
+            raise CommandError("Cannot tell the format from the file name; pass --format")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if options["resume"] and not options["checkpoint"]:
+            raise CommandError("--resume needs --checkpoint")
+
+        self.options = options
+        self.stats = {"source": options["path"], "record": 0, "imported": 0, "rejected": 0, "authors": 0}
+        saved = None
+        if options["resume"]:
+            saved = ImportCheckpoint.objects.filter(name=options["checkpoint"]).values_list("stats", flat=True).first()
+        if saved is not None:
+            if saved.get("source") != options["path"]:
+                raise CommandError(f"{options['checkpoint']} belongs to {saved.get('source')}")
+            self.stats.update(saved)
+        skip = self.stats["record"]
+
+        # Author name -> id; grows with the distinct authors seen, not the file
+        self.author_ids = {}
+        self.title_max_length = Book._meta.get_field("title").max_length
+        self.author_max_length = Author._meta.get_field("name").max_length
+        self.year_validator = BookSerializer().validate_publication_year
+        self.rejects = open(options["rejects"], "a") if options["rejects"] else None
+        if self.rejects and "rejects_offset" in self.stats:
+            # Drop the lines of records after the checkpoint; they are read again
+            self.rejects.truncate(self.stats["rejects_offset"])
+
+        started = time.perf_counter()
+        imported_before = self.stats["imported"]
+        flushed = skip
+        stream = sys.stdin if options["path"] == "-" else open(options["path"], newline="", encoding="utf-8")
+        try:
+            batch = []
+            for number, record in self.records(stream, fmt):
+                if number <= skip:
+                    continue
+                try:
+                    batch.append(self.clean(record))
+                except Rejected as exc:
+                    self.reject(number, record, str(exc))
+                self.stats["record"] = number
+                # Count rejects too, so the checkpoint moves on through bad stretches
+                if number - flushed >= options["batch_size"]:
+                    self.flush(batch)
+                    batch, flushed = [], number
+            self.flush(batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if self.rejects:
+                self.rejects.close()
+
+        elapsed = time.perf_counter() - started
+        rate = (self.stats["imported"] - imported_before) / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Imported {self.stats['imported']} books ({self.stats['authors']} new authors), "
+            f"rejected {self.stats['rejected']} of {self.stats['record']} records "
+            f"in {elapsed:.1f}s ({rate:,.0f} books/s)"
+        )
+
+    def records(self, stream, fmt):
+        """(record number, record) pairs; unparseable lines come back as strings"""
+        if fmt == "csv":
+            reader = csv.DictReader(stream)
+            for number, row in enumerate(reader, start=1):
+                yield number, row
+            return
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, line.rstrip("\n")
+
+    def clean(self, record):
+        if not isinstance(record, dict):
+            raise Rejected("not a JSON object")
+        title = str(record.get("title") or "").strip()
+        author = str(record.get("author") or "").strip()
+        if not title or len(title) > self.title_max_length:
+            raise Rejected(f"title must be 1-{self.title_max_length} characters")
+        if not author or len(author) > self.author_max_length:
+            raise Rejected(f"author must be 1-{self.author_max_length} characters")
+        try:
+            year = int(record.get("publication_year"))
+            self.year_validator(year)
+        except (TypeError, ValueError):
+            raise Rejected("publication_year must be an integer")
+        except serializers.ValidationError as exc:
+            raise Rejected(str(exc.detail[0]))
+        return title, year, author
+
+    def reject(self, number, record, reason):
+        self.stats["rejected"] += 1
+        if self.rejects:
+            self.rejects.write(json.dumps({"record": number, "reason": reason, "data": record}) + "\n")
+        if self.options["verbosity"] > 1:
+            self.stderr.write(f"record {number}: {reason}")
+
+    def flush(self, batch):
+        if self.rejects:
+            self.rejects.flush()
+            self.stats["rejects_offset"] = os.fstat(self.rejects.fileno()).st_size
+        with transaction.atomic(), fts.deferred_book_indexing(connection):
+            author_ids = self.resolve_authors({author for _, _, author in batch})
+            rows = [(title, year, author_ids[author]) for title, year, author in batch]
+            insert_rows(connection, Book, ["title", "publication_year", "author"], rows)
+            if batch:
+                # Raw inserts send no post_save, so count them and invalidate cached lists here
+                counters.apply_deltas(*counters.book_deltas(added=[(author, year) for _, year, author in rows]))
+                invalidate([CATALOG])
+            self.stats["imported"] += len(batch)
+            # Committed with the batch, so a crash never leaves the two apart
+            self.save_checkpoint()
+        if self.options["verbosity"] > 1:
+            self.stderr.write(f"  {self.stats['record']} records, {self.stats['imported']} imported")
+
+    def resolve_authors(self, names):
+        missing = [name for name in names if name not in self.author_ids]
+        for start in range(0, len(missing), MAX_LOOKUP):
+            chunk = missing[start:start + MAX_LOOKUP]
+            # Names are not unique; the oldest author wins, as it would on a re-run
+            for pk, name in Author.objects.filter(name__in=chunk).order_by("-id").values_list("id", "name"):
+                self.author_ids[name] = pk
+        new = [Author(name=name) for name in missing if name not in self.author_ids]
+        for author in Author.objects.bulk_create(new):
+            self.author_ids[author.name] = author.pk
+        self.stats["authors"] += len(new)
+        return self.author_ids
+
+    def save_checkpoint(self):
+        if self.options["checkpoint"]:
+            ImportCheckpoint.objects.update_or_create(name=self.options["checkpoint"], defaults={"stats": self.stats})
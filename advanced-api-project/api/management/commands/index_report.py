@@ -0,0 +1,86 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from api.models import Book
+
+# Matches "USING INDEX x" / "USING COVERING INDEX x" in SQLite query plans
+INDEX_RE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+class Command(BaseCommand):
+    help = "Show which indexes the query plan of each book endpoint uses"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def scenarios(self):
+        # Representative requests built from whatever data is in the database
+        book = Book.objects.order_by("id").first()
+        pk = book.pk if book else 1
+        year = book.publication_year if book else 2000
+        title = book.title if book else "Title"
+        author = book.author_id if book else 1
+        word = title.split()[0] if title.split() else "a"
+        return [
+            ("list", reverse("book-list"), {}),
+            ("list by year desc", reverse("book-list"), {"ordering": "-publication_year"}),
+            ("list filtered by year", reverse("book-list"), {"publication_year": year}),
+            ("list filtered by title", reverse("book-list"), {"title": title}),
+            ("list by author and year", reverse("book-list"), {"author": author, "ordering": "publication_year"}),
+            ("list search", reverse("book-list"), {"search": word}),
+            ("detail", reverse("book-detail", kwargs={"pk": pk}), {}),
+        ]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                steps = [row[-1] for row in cursor.fetchall()]
+            else:
+                cursor.execute(connection.ops.explain_query_prefix() + " " + sql)
+                steps = [" ".join(str(col) for col in row) for row in cursor.fetchall()]
+        indexes = sorted({name for step in steps for name in INDEX_RE.findall(step)})
+        scans = [step for step in steps if step.startswith("SCAN") and "INDEX" not in step]
+        return {"sql": sql, "plan": steps, "indexes": indexes, "full_scans": scans}
+
+    def handle(self, *args, **options):
+        client = Client()
+        report = []
+        for name, path, params in self.scenarios():
+            # Cached responses would skip the queries we want to explain
+            with override_settings(ALLOWED_HOSTS=["testserver"], API_CACHE_ENABLED=False):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = client.get(path, params)
+            queries = [
+                self.explain(query["sql"])
+                for query in ctx.captured_queries
+                if query["sql"].lstrip().upper().startswith("SELECT")
+                and "sqlite_master" not in query["sql"]
+            ]
+            report.append({
+                "endpoint": name,
+                "url": path,
+                "params": params,
+                "status": response.status_code,
+                "queries": queries,
+            })
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2, default=str))
+            return
+
+        for entry in report:
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{entry['endpoint']}: GET {entry['url']} {entry['params'] or ''}".rstrip()
+                + f" -> {entry['status']}"
+            ))
+            for query in entry["queries"]:
+                for step in query["plan"]:
+                    style = self.style.WARNING if step in query["full_scans"] else str
+                    self.stdout.write(style(f"  {step}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import counters
+from api.cache import CATALOG, invalidate
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Author.book_count and the per-year book counters from the "
+        "books table, e.g. after raw SQL writes or a restore"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        with transaction.atomic(using=options["database"]):
+            authors, years = counters.recount(using=options["database"])
+        if authors or years:
+            # Author responses carry book_count
+            invalidate([CATALOG])
+        self.stdout.write(f"Fixed {authors} author counts and {years} year counts")
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Refresh SQLite replica databases with an online backup of the primary"
+
+    def add_arguments(self, parser):
+        parser.add_argument("aliases", nargs="*", help="Default: API_READ_REPLICAS")
+
+    def handle(self, *args, **options):
+        aliases = options["aliases"] or list(getattr(settings, "API_READ_REPLICAS", []))
+        if not aliases:
+            raise CommandError("No replicas given or listed in API_READ_REPLICAS")
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in aliases:
+            if alias not in connections or alias == DEFAULT_DB_ALIAS:
+                raise CommandError(f"{alias!r} is not a replica database alias")
+            if primary.vendor != "sqlite" or connections[alias].vendor != "sqlite":
+                raise CommandError("Snapshots are for SQLite; use real replication elsewhere")
+
+        primary.ensure_connection()
+        for alias in aliases:
+            replica = connections[alias]
+            replica.ensure_connection()
+            # Consistent copy page by page while the primary stays writable
+            primary.connection.backup(replica.connection)
+            self.stdout.write(f"{alias}: copied {primary.settings_dict['NAME']} -> {replica.settings_dict['NAME']}")
@@ -0,0 +1,25 @@
+# Full-text index over book title and author name (SQLite FTS5 only).
+# Kept in sync by triggers so every write path (ORM, admin, raw SQL) is covered.
+
+from django.db import migrations
+
+from api import fts
+
+
+def create_fts(apps, schema_editor):
+    fts.install(schema_editor)
+
+
+def drop_fts(apps, schema_editor):
+    fts.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
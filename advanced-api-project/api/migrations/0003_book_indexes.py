@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_book_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title', 'id'], name='book_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publication_year', 'title', 'id'], name='book_year_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['-publication_year', 'id'], name='book_year_desc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', 'publication_year'], name='book_author_year_idx'),
+        ),
+    ]
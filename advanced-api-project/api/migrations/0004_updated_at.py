@@ -0,0 +1,38 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+from api import fts
+
+
+# SQLite rebuilds both tables to add the columns; the FTS triggers reference
+# them, so take the triggers down for the rebuild and put them back after.
+def drop_fts_triggers(apps, schema_editor):
+    fts.drop_triggers(schema_editor)
+
+
+def create_fts_triggers(apps, schema_editor):
+    fts.create_triggers(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_book_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts_triggers, create_fts_triggers),
+        migrations.AddField(
+            model_name='author',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(create_fts_triggers, drop_fts_triggers),
+    ]
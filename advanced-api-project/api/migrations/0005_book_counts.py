@@ -0,0 +1,57 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+from api import fts
+
+
+# Adding author.book_count rebuilds api_author, which the FTS triggers reference
+def drop_fts_triggers(apps, schema_editor):
+    fts.drop_triggers(schema_editor)
+
+
+def create_fts_triggers(apps, schema_editor):
+    fts.create_triggers(schema_editor)
+
+
+def count_books(apps, schema_editor):
+    Author = apps.get_model('api', 'Author')
+    Book = apps.get_model('api', 'Book')
+    BookYearCount = apps.get_model('api', 'BookYearCount')
+    using = schema_editor.connection.alias
+    books = Book.objects.using(using).order_by()
+    for author_id, count in books.values('author').annotate(n=Count('id')).values_list('author', 'n'):
+        Author.objects.using(using).filter(pk=author_id).update(book_count=count)
+    BookYearCount.objects.using(using).bulk_create([
+        BookYearCount(year=year, book_count=count)
+        for year, count in books.values('publication_year').annotate(n=Count('id'))
+        .values_list('publication_year', 'n')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookYearCount',
+            fields=[
+                ('year', models.IntegerField(primary_key=True, serialize=False)),
+                ('book_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(drop_fts_triggers, create_fts_triggers),
+        migrations.AddField(
+            model_name='author',
+            name='book_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['book_count', 'id'], name='author_book_count_idx'),
+        ),
+        migrations.RunPython(create_fts_triggers, drop_fts_triggers),
+        migrations.RunPython(count_books, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_book_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(fields=['name', 'id'], name='author_name_idx'),
+        ),
+    ]
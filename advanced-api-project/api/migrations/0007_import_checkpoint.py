@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_author_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('stats', models.JSONField(default=dict)),
+            ],
+        ),
+    ]
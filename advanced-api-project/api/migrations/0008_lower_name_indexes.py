@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:04
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('id'), name='author_name_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.functions.text.Lower('title'), models.F('id'), name='book_title_lower_idx'),
+        ),
+    ]
@@ -1,9 +1,34 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 # Create your models here.
 # Author model to store book authors
 class Author(models.Model):
     name=models.CharField(max_length=200)
+    # bumped on every save; feeds the ETag / Last-Modified validators
+    updated_at=models.DateTimeField(auto_now=True)
+    # denormalized number of books, maintained by api.counters
+    book_count=models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # AuthorListView ?ordering=book_count (id is the keyset tiebreaker)
+            models.Index(fields=['book_count', 'id'], name='author_book_count_idx'),
+            # AuthorListView ?ordering=name
+            models.Index(fields=['name', 'id'], name='author_name_idx'),
+            # Case-insensitive name prefixes (autocomplete fallback)
+            models.Index(Lower('name'), 'id', name='author_name_lower_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # book_count is only written by api.counters' F() updates; saving an
+        # author loaded earlier must not overwrite increments made since
+        if not self._state.adding and not kwargs.get('force_insert'):
+            fields = kwargs.get('update_fields')
+            if fields is None:
+                fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [name for name in fields if name != 'book_count']
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -13,5 +38,48 @@ class Book(models.Model):
     publication_year=models.IntegerField()
     #one author can have many books
     author=models.ForeignKey(Author, related_name='books' , on_delete=models.CASCADE)
+    # bumped on every save; feeds the ETag / Last-Modified validators
+    updated_at=models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # Indexes matched to the filter/order combinations BookListView serves
+        # (every ordering ends in `id`, the keyset pagination tiebreaker)
+        indexes = [
+            models.Index(fields=['title', 'id'], name='book_title_idx'),
+            models.Index(fields=['publication_year', 'title', 'id'], name='book_year_title_idx'),
+            models.Index(fields=['-publication_year', 'id'], name='book_year_desc_idx'),
+            models.Index(fields=['author', 'publication_year'], name='book_author_year_idx'),
+            # Case-insensitive title prefixes (autocomplete fallback)
+            models.Index(Lower('title'), 'id', name='book_title_lower_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the counters currently count this book under (see api.counters)
+        instance._counted = (
+            instance.__dict__.get('author_id'), instance.__dict__.get('publication_year')
+        )
+        return instance
+
+    def __str__(self):
+        return f"{self.title} ({self.publication_year})"
+
+
+# Denormalized number of books per publication year, maintained by api.counters
+class BookYearCount(models.Model):
+    year=models.IntegerField(primary_key=True)
+    book_count=models.IntegerField(default=0)
+
     def __str__(self):
-        return f"{self.title} ({self.publication_year})"
\ No newline at end of file
+        return f"{self.year}: {self.book_count}"
+
+
+# Progress of a resumable import_books run, saved in the same transaction as
+# each batch so the offset and the imported rows always agree
+class ImportCheckpoint(models.Model):
+    name=models.CharField(max_length=255, unique=True)
+    stats=models.JSONField(default=dict)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,191 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# Keyset (seek) pagination: instead of OFFSET, each page continues from the
+# sort key of the last row seen, so page N costs the same as page 1.
+class KeysetCursorPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    # Unique column appended to every ordering so the sort key is total
+    tiebreaker = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # Same as paginate_queryset, fetching the page with the async ORM
+        return self.finish_page([row async for row in self.page_queryset(queryset, request, view)])
+
+    def page_queryset(self, queryset, request, view=None):
+        """The (unevaluated) queryset for one page plus a lookahead row"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor["r"])
+        if self.cursor is not None:
+            try:
+                queryset = queryset.filter(self.seek_filter(self.cursor["v"], self.reverse))
+            except (TypeError, ValueError, ValidationError):
+                # Well-formed cursor whose values do not fit the sort fields' types
+                raise NotFound(self.invalid_cursor_message)
+
+        ordering = [self._flip(field) for field in self.ordering] if self.reverse else self.ordering
+        return queryset.order_by(*ordering)[: self.page_size + 1]
+
+    def finish_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                pass
+            else:
+                if size > 0:
+                    return min(size, self.max_page_size)
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        # Follow OrderingFilter (and so the view's `ordering` default) when present
+        ordering = None
+        for backend in getattr(view, "filter_backends", None) or []:
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = getattr(view, "ordering", None) or []
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        ordering = [field for field in ordering if field.lstrip("-") != self.tiebreaker]
+        return ordering + [self.tiebreaker]
+
+    def seek_filter(self, values, reverse=False):
+        # (a, b, id) > (x, y, z) expanded into
+        #   a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z)
+        # with the comparison flipped for descending fields.
+        condition = None
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            step = equal & Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            condition = step if condition is None else condition | step
+            equal &= Q(**{name: value})
+
+        # Redundant bound on the leading column lets SQLite range-scan an index
+        first = self.ordering[0]
+        descending = first.startswith("-") != reverse
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if descending else 'gte'}": values[0]})
+        return bound & condition
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        values = [self._value(row, field.lstrip("-")) for field in self.ordering]
+        payload = json.dumps(
+            {"o": self.ordering, "v": values, "r": reverse},
+            separators=(",", ":"),
+            default=str,
+        )
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        except (TypeError, ValueError, UnicodeDecodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor is only meaningful for the ordering it was issued under
+        if (
+            not isinstance(cursor, dict)
+            or cursor.get("o") != self.ordering
+            or not isinstance(cursor.get("v"), list)
+            or len(cursor["v"]) != len(self.ordering)
+            or not all(isinstance(value, (str, int, float)) for value in cursor["v"])
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        cursor["r"] = bool(cursor.get("r"))
+        return cursor
+
+    @staticmethod
+    def _value(row, name):
+        # Rows are model instances, or dicts on the values() fast path
+        return row[name] if isinstance(row, dict) else getattr(row, name)
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith("-") else "-" + field
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
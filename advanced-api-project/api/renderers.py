@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+
+# Newline-delimited JSON: one compact JSON document per line.
+# BookListView streams rows through `iter_lines` instead of calling `render`
+# with a fully built list; `render` covers everything else (e.g. error bodies).
+class NDJSONRenderer(BaseRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def encode(self, item):
+        return json.dumps(
+            item, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8") + b"\n"
+
+    def iter_lines(self, items):
+        for item in items:
+            yield self.encode(item)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, list):
+            return b"".join(self.iter_lines(data))
+        return self.encode(data)
+
+
+# JSON lines under the name catalog exports use (?format=jsonl)
+class JSONLRenderer(NDJSONRenderer):
+    format = "jsonl"
+
+
+# CSV with a header row. The export view streams rows itself; `render`
+# covers small payloads such as error bodies.
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        rows = [row if isinstance(row, dict) else {"detail": row} for row in rows]
+        header = list(dict.fromkeys(key for row in rows for key in row))
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=header)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({
+                key: " ".join(map(str, value)) if isinstance(value, list) else value
+                for key, value in row.items()
+            })
+        return buffer.getvalue().encode("utf-8")
@@ -0,0 +1,154 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+# A client that wrote sends this back (cookie or header) to keep reading from
+# the primary until the timestamp it carries
+PIN_COOKIE = "api_primary_until"
+PIN_HEADER = "X-Primary-Until"
+
+# Alias the current request reads api models from, when it may use a replica
+_read_alias = ContextVar("api_read_alias", default=None)
+
+_lock = threading.Lock()
+_round_robin = itertools.count()
+# Requests currently reading from each replica (least-load selection)
+_in_flight = {}
+
+
+def get_replicas():
+    return list(getattr(settings, "API_READ_REPLICAS", []))
+
+
+def choose_replica():
+    replicas = get_replicas()
+    if not replicas:
+        return None
+    with _lock:
+        turn = next(_round_robin)
+        if getattr(settings, "API_REPLICA_SELECTION", "round-robin") == "least-load":
+            # Fewest in-flight requests; round-robin among equals
+            rotated = replicas[turn % len(replicas):] + replicas[:turn % len(replicas)]
+            return min(rotated, key=lambda alias: _in_flight.get(alias, 0))
+        return replicas[turn % len(replicas)]
+
+
+def is_pinned(request):
+    """True while a client's last write is younger than the pin window"""
+    value = request.COOKIES.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+    try:
+        return float(value) > time.time()
+    except (TypeError, ValueError):
+        return False
+
+
+@contextmanager
+def replica_reads(request):
+    """Route this request's api model reads to one replica, unless it writes
+    or the client is pinned to the primary.
+    """
+    alias = None
+    if request.method in SAFE_METHODS and not is_pinned(request):
+        alias = choose_replica()
+    if alias is None:
+        yield DEFAULT_DB_ALIAS
+        return
+    with _lock:
+        _in_flight[alias] = _in_flight.get(alias, 0) + 1
+    token = _read_alias.set(alias)
+    try:
+        yield alias
+    finally:
+        _read_alias.reset(token)
+        with _lock:
+            _in_flight[alias] -= 1
+
+
+def stream_from(alias, chunks):
+    """Iterate a streaming body with its reads still routed to `alias`.
+
+    The body is produced after the view (and its replica_reads block) has
+    returned. The alias is set around each step only, so no context variable
+    is held across a yield to a server that may resume us elsewhere.
+    """
+    with _lock:
+        _in_flight[alias] = _in_flight.get(alias, 0) + 1
+    try:
+        iterator = iter(chunks)
+        while True:
+            token = _read_alias.set(alias)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _read_alias.reset(token)
+            yield chunk
+    finally:
+        with _lock:
+            _in_flight[alias] -= 1
+
+
+def reading_from_replica():
+    return _read_alias.get() is not None
+
+
+# Sends reads of the api app's models to the replica chosen for the current
+# request (see ReplicaReadMixin) and every write, and everything outside
+# those views, to the primary.
+class ReplicaRouter:
+    app_label = "api"
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == self.app_label:
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of the primary, never migrated on their own
+        if db in get_replicas():
+            return False
+        return None
+
+
+# Read views opt in to replica reads for safe requests
+class ReplicaReadMixin:
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads(request) as alias:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.streaming and not response.is_async and alias != DEFAULT_DB_ALIAS:
+            response.streaming_content = stream_from(alias, response.streaming_content)
+        return response
+
+
+# Pins a client to the primary for API_READ_YOUR_WRITES_WINDOW seconds after
+# each successful write, so it reads its own changes even while replicas lag.
+# Browsers get a cookie; API clients can echo the X-Primary-Until header.
+class ReadYourWritesMiddleware(MiddlewareMixin):
+
+    def process_response(self, request, response):
+        if request.method in SAFE_METHODS or response.status_code >= 400 or not get_replicas():
+            return response
+        window = getattr(settings, "API_READ_YOUR_WRITES_WINDOW", 5)
+        until = f"{time.time() + window:.3f}"
+        response[PIN_HEADER] = until
+        response.set_cookie(PIN_COOKIE, until, max_age=window, httponly=True, samesite="Lax")
+        return response
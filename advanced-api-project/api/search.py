@@ -0,0 +1,58 @@
+from django.db import connection, connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .fts import FTS_TABLE, has_fts_table
+from .models import Book
+
+SEARCH_RANK = "search_rank"
+
+# (alias, database name) -> whether the FTS table exists
+_fts_tables = {}
+
+
+def fts_enabled(conn=connection):
+    """True when the current database carries the FTS5 index from migration 0002"""
+    if conn.vendor != "sqlite":
+        return False
+    key = (conn.alias, str(conn.settings_dict["NAME"]))
+    if key not in _fts_tables:
+        _fts_tables[key] = has_fts_table(conn)
+    return _fts_tables[key]
+
+
+def fts_query(terms):
+    # Every term must match (as a prefix) in title or author name; quoting
+    # keeps user input from being read as FTS5 query syntax.
+    return " ".join('"%s"*' % term.replace('"', '""') for term in terms)
+
+
+# Drop-in replacement for SearchFilter that answers from the FTS5 index and
+# annotates a bm25 `search_rank` (lower is better). Falls back to the regular
+# icontains search when the index is not available.
+class FTS5SearchFilter(SearchFilter):
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or queryset.model is not Book or not fts_enabled(connections[queryset.db]):
+            return super().filter_queryset(request, queryset, view)
+
+        # Join the index once: a single MATCH yields both the matching rows
+        # and their bm25 score, which ordering and the cursor seek reuse
+        table = Book._meta.db_table
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {table}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[fts_query(terms)],
+        ).annotate(**{SEARCH_RANK: RawSQL(f"bm25({FTS_TABLE})", [], output_field=FloatField())})
+
+
+# Orders ranked search results by relevance unless the client asked for an
+# explicit ordering.
+class RankedOrderingFilter(OrderingFilter):
+
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and SEARCH_RANK in queryset.query.annotations:
+            return [SEARCH_RANK]
+        return super().get_ordering(request, queryset, view)
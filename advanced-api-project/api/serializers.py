@@ -1,13 +1,103 @@
+from django.conf import settings
+from django.urls import reverse
 from rest_framework import serializers
+from . import autocomplete, counters
+from .cache import CATALOG, invalidate
 from .models import Author, Book
+from .timing import TimedSerializerMixin
 import datetime
 
 
+# PrimaryKeyRelatedField that looks ids up in objects preloaded by
+# `preload_related_objects` instead of running one query per value.
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+
+    def to_internal_value(self, data):
+        resolved = self.context.get('related_objects', {}).get(self.field_name)
+        if resolved is None or self.pk_field is not None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = resolved.get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+def preload_related_objects(serializer, items):
+    """Resolve every batched relation referenced by `items` with one in_bulk
+    query per field, store the objects in the serializer context and return
+    the ids that do not exist, as {field name: [ids]}.
+    """
+    related, missing = {}, {}
+    for name, field in serializer.fields.items():
+        if not isinstance(field, BatchedPrimaryKeyRelatedField) or field.read_only:
+            continue
+        ids = set()
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            if value is None or isinstance(value, bool):
+                continue
+            try:
+                ids.add(int(value))
+            except (TypeError, ValueError):
+                pass
+        found = field.get_queryset().in_bulk(ids)
+        related[name] = found
+        if ids - found.keys():
+            missing[name] = sorted(ids - found.keys())
+    serializer.context.setdefault('related_objects', {}).update(related)
+    return missing
+
+
+# List serializer used for many=True writes: one bulk INSERT per batch instead
+# of one per book. With `collect_item_errors` in the context, invalid items are
+# set aside in `item_errors` (by index) instead of failing the whole list.
+class BookListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+
+    def to_internal_value(self, data):
+        # Resolve all authors up front: one query for the whole list
+        if isinstance(data, list):
+            self.missing_related = preload_related_objects(self.child, data)
+
+        if not self.context.get('collect_item_errors'):
+            return super().to_internal_value(data)
+        if not isinstance(data, list):
+            self.fail('not_a_list', input_type=type(data).__name__)
+
+        valid, self.item_errors = [], []
+        for index, item in enumerate(data):
+            try:
+                valid.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors.append({'index': index, 'errors': exc.detail})
+        return valid
+
+    def create(self, validated_data):
+        batch_size = self.context.get('batch_size') or getattr(settings, 'API_BULK_BATCH_SIZE', 500)
+        books = Book.objects.bulk_create(
+            [Book(**item) for item in validated_data], batch_size=batch_size
+        )
+        # bulk_create sends no post_save, so count and index the new books
+        # (in the caller's transaction) and invalidate cached lists here
+        counters.apply_deltas(*counters.book_deltas(added=map(counters.counted_as, books)))
+        autocomplete.index_after_commit(autocomplete.BOOK, [(book.pk, book.title) for book in books])
+        invalidate([CATALOG])
+        return books
+
+
 # Serializer for Book model
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    serializer_related_field = BatchedPrimaryKeyRelatedField
+
     class Meta:
         model = Book
         fields = ['id', 'title', 'publication_year', 'author']
+        list_serializer_class = BookListSerializer
 
     # Custom validation: publication year must not be in the future
     def validate_publication_year(self, value):
@@ -18,10 +108,19 @@ class BookSerializer(serializers.ModelSerializer):
 
 
 # Serializer for Author model with nested BookSerializer
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # Nested serializer for related books
+    # (the author views prefetch only the newest few, see `books_url` for the rest)
     books = BookSerializer(many=True, read_only=True)
+    books_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Author
-        fields = ['id', 'name', 'books']
+        fields = ['id', 'name', 'book_count', 'books', 'books_url']
+
+
+    # Link to the full, paginated list of this author's books
+    def get_books_url(self, obj):
+        url = f"{reverse('book-list')}?author={obj.pk}&ordering=-publication_year"
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import autocomplete, counters
+from .authentication import forget_tokens
+from .cache import CATALOG, book_scope, invalidate
+from .models import Author, Book
+
+
+@receiver([post_save, post_delete], sender=Book)
+def invalidate_book(sender, instance, **kwargs):
+    invalidate([CATALOG, book_scope(instance.pk)])
+
+
+@receiver(pre_save, sender=Book)
+def remember_counted(sender, instance, **kwargs):
+    # Instances not loaded from the database don't know what they were counted as
+    if instance.pk is not None and None in getattr(instance, '_counted', (None,)):
+        instance._counted = (
+            Book.objects.filter(pk=instance.pk).values_list('author_id', 'publication_year').first()
+        )
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book(sender, instance, created, raw=False, **kwargs):
+    # Runs inside the saving view's transaction, so counts commit with the book
+    if raw:
+        return
+    before = getattr(instance, '_counted', None)
+    if created or before is None:
+        counters.book_created(instance)
+    else:
+        counters.book_changed(instance, before)
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book(sender, instance, **kwargs):
+    counters.book_deleted(instance)
+
+
+@receiver([post_save, post_delete], sender=Author)
+def invalidate_author(sender, instance, **kwargs):
+    # Author names feed list search results; book details only carry the id
+    invalidate([CATALOG])
+
+
+@receiver(post_save, sender=Book)
+def index_book_title(sender, instance, raw=False, **kwargs):
+    if not raw:
+        autocomplete.index_after_commit(autocomplete.BOOK, [(instance.pk, instance.title)])
+
+
+@receiver(post_save, sender=Author)
+def index_author_name(sender, instance, raw=False, **kwargs):
+    if not raw:
+        autocomplete.index_after_commit(autocomplete.AUTHOR, [(instance.pk, instance.name)])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    autocomplete.unindex_after_commit(autocomplete.BOOK, instance.pk)
+
+
+@receiver(post_delete, sender=Author)
+def unindex_author(sender, instance, **kwargs):
+    autocomplete.unindex_after_commit(autocomplete.AUTHOR, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Token)
+def forget_token(sender, instance, **kwargs):
+    # Revoked or rotated tokens must stop authenticating immediately
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_user_tokens(sender, instance, **kwargs):
+    # Cached tokens carry the user; drop them on deactivation or any other change
+    forget_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
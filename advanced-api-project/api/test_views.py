@@ -1,16 +1,43 @@
 # api/test_views.py
-from django.urls import reverse
+import base64
+import csv
+import gzip
+import io
+import json
+import time
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from rest_framework.authtoken.models import Token
 
-from .models import Author, Book
+from . import autocomplete, replicas
+from .models import Author, Book, BookYearCount
+from .search import fts_enabled
+from .authentication import clear_token_cache
+from .fastpath import compile_field_plan
+from .filters import BookFilter
+from .serializers import AuthorSerializer, BookSerializer
+from .views import BookListView
 
 User = get_user_model()
 
 
-class BookAPITestCase(APITestCase):
+class CacheClearedAPITestCase(APITestCase):
+    def setUp(self):
+        # Responses and tokens are cached between requests; start every test cold
+        cache.clear()
+        clear_token_cache()
+
+
+class BookAPITestCase(CacheClearedAPITestCase):
     @classmethod
     def setUpTestData(cls):
         # Create authors
@@ -38,6 +65,7 @@ class BookAPITestCase(APITestCase):
         # detail/update/delete use pk in URL - will compute in tests
 
     def setUp(self):
+        super().setUp()
         # new client for each test
         self.client = APIClient()
 
@@ -48,7 +76,7 @@ class BookAPITestCase(APITestCase):
         resp = self.client.get(self.list_url)
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         # Ensure returned count >= created in setUpTestData
-        self.assertGreaterEqual(len(resp.json()), 3)
+        self.assertGreaterEqual(len(resp.json()["results"]), 3)
 
     def test_retrieve_book_detail_public(self):
         """Anyone can retrieve a single book"""
@@ -111,7 +139,7 @@ class BookAPITestCase(APITestCase):
         """Filter books by publication_year query param"""
         resp = self.client.get(self.list_url, {"publication_year": 2010})
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        data = resp.json()
+        data = resp.json()["results"]
         # All returned items should have publication_year == 2010
         self.assertTrue(all(item["publication_year"] == 2010 for item in data))
 
@@ -119,7 +147,7 @@ class BookAPITestCase(APITestCase):
         """Search for books matching 'River' in title"""
         resp = self.client.get(self.list_url, {"search": "River"})
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        data = resp.json()
+        data = resp.json()["results"]
         # At least one returned book should contain 'River' in title (case-insensitive)
         self.assertTrue(any("river" in item["title"].lower() for item in data))
 
@@ -127,7 +155,1548 @@ class BookAPITestCase(APITestCase):
         """Ordering - check that ordering=-publication_year returns descending years"""
         resp = self.client.get(self.list_url, {"ordering": "-publication_year"})
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
-        data = resp.json()
+        data = resp.json()["results"]
         years = [item["publication_year"] for item in data]
         # list should be non-increasing
         self.assertEqual(years, sorted(years, reverse=True))
+
+
+class BookPaginationTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name="Chinua Achebe")
+        cls.author2 = Author.objects.create(name="Ngugi wa Thiong'o")
+
+        # Duplicate titles and years so the id tiebreaker matters
+        titles = ["Arrow", "Arrow", "Drum", "Drum", "Drum", "River", "Sun"]
+        for i, title in enumerate(titles):
+            Book.objects.create(
+                title=title,
+                publication_year=1990 + (i % 3),
+                author=cls.author1 if i % 2 else cls.author2,
+            )
+
+        cls.list_url = reverse("book-list")
+
+    def walk(self, params):
+        """Follow `next` links and return every id seen, page by page"""
+        pages = []
+        resp = self.client.get(self.list_url, params)
+        while True:
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            body = resp.json()
+            pages.append([item["id"] for item in body["results"]])
+            if not body["next"]:
+                return pages
+            resp = self.client.get(body["next"])
+
+    def test_pages_cover_ordering_without_gaps_or_duplicates(self):
+        pages = self.walk({"page_size": 2})
+        seen = [pk for page in pages for pk in page]
+        expected = list(Book.objects.order_by("title", "id").values_list("id", flat=True))
+        self.assertEqual(seen, expected)
+        self.assertTrue(all(len(page) <= 2 for page in pages))
+
+    def test_descending_ordering_is_followed(self):
+        pages = self.walk({"page_size": 3, "ordering": "-publication_year"})
+        seen = [pk for page in pages for pk in page]
+        expected = list(
+            Book.objects.order_by("-publication_year", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_pagination_with_filter_and_search(self):
+        pages = self.walk({"page_size": 1, "search": "Drum", "publication_year": 1990})
+        seen = [pk for page in pages for pk in page]
+        expected = list(
+            Book.objects.filter(title__icontains="Drum", publication_year=1990)
+            .order_by("title", "id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(self.list_url, {"page_size": 3}).json()
+        self.assertIsNone(first["previous"])
+        second = self.client.get(first["next"]).json()
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+
+    def test_later_pages_do_not_use_offset(self):
+        first = self.client.get(self.list_url, {"page_size": 2}).json()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first["next"])
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn("OFFSET", sql.upper())
+
+    def test_invalid_cursor(self):
+        resp = self.client.get(self.list_url, {"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_wrongly_typed_cursor_values(self):
+        def cursor(ordering, values):
+            payload = json.dumps({"o": ordering, "v": values, "r": False})
+            return base64.urlsafe_b64encode(payload.encode()).decode()
+
+        for params in (
+            {"cursor": cursor(["title", "id"], ["Book", "abc"])},
+            {"cursor": cursor(["publication_year", "id"], ["abc", 1]), "ordering": "publication_year"},
+            {"cursor": cursor(["title", "id"], ["Book", None])},
+            {"cursor": cursor(["title", "id"], [["Book"], 1])},
+        ):
+            resp = self.client.get(self.list_url, params)
+            self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND, params)
+
+    def test_cursor_rejected_when_ordering_changes(self):
+        first = self.client.get(self.list_url, {"page_size": 2}).json()
+        cursor = parse_qs(urlparse(first["next"]).query)["cursor"][0]
+        resp = self.client.get(self.list_url, {"cursor": cursor, "ordering": "publication_year"})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BookStreamingTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name="Author One")
+        for i in range(5):
+            Book.objects.create(title=f"Book {i}", publication_year=2000 + i, author=author)
+        cls.list_url = reverse("book-list")
+
+    def read_lines(self, resp):
+        self.assertTrue(resp.streaming)
+        body = b"".join(resp.streaming_content).decode()
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_format_query_param_streams_ndjson(self):
+        resp = self.client.get(self.list_url, {"format": "ndjson", "page_size": 2})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        rows = self.read_lines(resp)
+        # Streaming is not paginated and matches the regular serializer output
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], BookSerializer(Book.objects.order_by("title").first()).data)
+
+    def test_accept_header_streams_ndjson_with_filters(self):
+        resp = self.client.get(
+            self.list_url,
+            {"ordering": "-publication_year", "search": "Book"},
+            HTTP_ACCEPT="application/x-ndjson",
+        )
+        rows = self.read_lines(resp)
+        years = [row["publication_year"] for row in rows]
+        self.assertEqual(years, sorted(years, reverse=True))
+
+    def test_stream_is_chunked(self):
+        with mock.patch.object(BookListView, "stream_chunk_size", 2):
+            rows = self.read_lines(self.client.get(self.list_url, {"format": "ndjson"}))
+        self.assertEqual(len(rows), 5)
+
+
+class BookFullTextSearchTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.achebe = Author.objects.create(name="Chinua Achebe")
+        cls.ngugi = Author.objects.create(name="Ngugi wa Thiong'o")
+        cls.river = Book.objects.create(
+            title="The River Between", publication_year=1965, author=cls.ngugi
+        )
+        cls.river_river = Book.objects.create(
+            title="River to River", publication_year=1970, author=cls.achebe
+        )
+        cls.arrow = Book.objects.create(title="Arrow of God", publication_year=1964, author=cls.achebe)
+        cls.list_url = reverse("book-list")
+
+    def search(self, term, **params):
+        resp = self.client.get(self.list_url, {"search": term, **params})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in resp.json()["results"]]
+
+    def test_search_uses_fts_index(self):
+        self.assertTrue(fts_enabled())
+        with CaptureQueriesContext(connection) as ctx:
+            self.search("river")
+        sql = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertIn("MATCH", sql)
+        self.assertNotIn("LIKE", sql)
+
+    def test_each_query_matches_once(self):
+        # Rank and filter come from one join; a per-row rank subquery would
+        # rerun MATCH for every hit
+        with CaptureQueriesContext(connection) as ctx:
+            first = self.client.get(self.list_url, {"search": "river", "page_size": 1, "facets": "author"}).json()
+            self.client.get(first["next"])
+        matching = [q["sql"] for q in ctx.captured_queries if "MATCH" in q["sql"]]
+        self.assertTrue(matching)
+        for sql in matching:
+            self.assertEqual(sql.count("MATCH"), 1, sql)
+
+    def test_results_ranked_by_relevance(self):
+        self.assertEqual(self.search("river"), [self.river_river.pk, self.river.pk])
+
+    def test_explicit_ordering_overrides_rank(self):
+        ids = self.search("river", ordering="publication_year")
+        self.assertEqual(ids, [self.river.pk, self.river_river.pk])
+
+    def test_terms_match_title_or_author_as_prefixes(self):
+        self.assertEqual(set(self.search("achebe")), {self.river_river.pk, self.arrow.pk})
+        self.assertEqual(self.search("ach arr"), [self.arrow.pk])
+
+    def test_ranked_results_paginate(self):
+        first = self.client.get(self.list_url, {"search": "river", "page_size": 1}).json()
+        second = self.client.get(first["next"]).json()
+        ids = [item["id"] for item in first["results"] + second["results"]]
+        self.assertEqual(ids, [self.river_river.pk, self.river.pk])
+
+    def test_index_follows_writes(self):
+        self.ngugi.name = "Ngugi Renamed"
+        self.ngugi.save()
+        self.assertEqual(self.search("renamed"), [self.river.pk])
+
+        self.arrow.title = "No Longer at Ease"
+        self.arrow.save()
+        self.assertEqual(self.search("arrow"), [])
+        self.assertEqual(self.search("ease"), [self.arrow.pk])
+
+        self.river.delete()
+        self.assertEqual(self.search("between"), [])
+
+    def test_falls_back_to_icontains_without_fts(self):
+        with mock.patch("api.search.fts_enabled", return_value=False):
+            with CaptureQueriesContext(connection) as ctx:
+                ids = self.search("iver")
+        self.assertEqual(set(ids), {self.river.pk, self.river_river.pk})
+        self.assertIn("LIKE", " ".join(q["sql"] for q in ctx.captured_queries))
+
+
+class AuthorAPITestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.prolific = Author.objects.create(name="Prolific Author")
+        cls.quiet = Author.objects.create(name="Quiet Author")
+        for year in range(1990, 1998):
+            Book.objects.create(title=f"Book {year}", publication_year=year, author=cls.prolific)
+        Book.objects.create(title="Only Book", publication_year=2001, author=cls.quiet)
+        for i in range(6):
+            author = Author.objects.create(name=f"Extra Author {i}")
+            Book.objects.create(title=f"Extra {i}", publication_year=2000 + i, author=author)
+
+    def test_list_counts_and_caps_nested_books(self):
+        resp = self.client.get(reverse("author-list"), {"search": "Author"})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        authors = {item["name"]: item for item in resp.json()["results"]}
+
+        prolific = authors["Prolific Author"]
+        self.assertEqual(prolific["book_count"], 8)
+        years = [book["publication_year"] for book in prolific["books"]]
+        self.assertEqual(years, [1997, 1996, 1995, 1994, 1993])
+        self.assertIn(f"author={self.prolific.pk}", prolific["books_url"])
+
+        self.assertEqual(authors["Quiet Author"]["book_count"], 1)
+        self.assertEqual(len(authors["Quiet Author"]["books"]), 1)
+
+    def test_books_url_lists_remaining_books(self):
+        resp = self.client.get(reverse("author-detail", kwargs={"pk": self.prolific.pk}))
+        books = self.client.get(resp.json()["books_url"]).json()["results"]
+        self.assertEqual(len(books), 8)
+
+    def test_query_count_independent_of_page_size(self):
+        for page_size in (1, 3, 8):
+            with self.assertNumQueries(2):
+                resp = self.client.get(reverse("author-list"), {"page_size": page_size})
+            self.assertEqual(len(resp.json()["results"]), page_size)
+
+    def test_detail(self):
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse("author-detail", kwargs={"pk": self.quiet.pk}))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json()["book_count"], 1)
+        self.assertEqual(resp.json()["books"][0]["title"], "Only Book")
+
+    def test_ordering_by_book_count_paginates(self):
+        first = self.client.get(
+            reverse("author-list"), {"ordering": "-book_count", "page_size": 2}
+        ).json()
+        self.assertEqual(first["results"][0]["name"], "Prolific Author")
+        seen = [item["id"] for item in first["results"]]
+        while first["next"]:
+            first = self.client.get(first["next"]).json()
+            seen += [item["id"] for item in first["results"]]
+        self.assertEqual(sorted(seen), sorted(Author.objects.values_list("id", flat=True)))
+
+
+class BookResponseCacheTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name="Author One")
+        cls.book = Book.objects.create(title="Alpha", publication_year=2000, author=cls.author)
+        cls.other = Book.objects.create(title="Beta", publication_year=2001, author=cls.author)
+        cls.user = User.objects.create_user(username="cacheuser", password="testpass123")
+        cls.list_url = reverse("book-list")
+        cls.detail_url = reverse("book-detail", kwargs={"pk": cls.book.pk})
+
+    def test_repeated_list_served_from_cache(self):
+        first = self.client.get(self.list_url, {"ordering": "title", "search": "a"})
+        self.assertEqual(first["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            second = self.client.get(self.list_url, {"search": "a", "ordering": "title"})
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+
+    def test_different_params_are_cached_separately(self):
+        self.client.get(self.list_url)
+        resp = self.client.get(self.list_url, {"publication_year": 2001})
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual([item["title"] for item in resp.json()["results"]], ["Beta"])
+
+    def test_book_write_invalidates_list_and_its_detail_only(self):
+        self.client.get(self.list_url)
+        self.client.get(self.detail_url)
+        other_url = reverse("book-detail", kwargs={"pk": self.other.pk})
+        self.client.get(other_url)
+
+        self.book.title = "Alpha Revised"
+        self.book.save()
+
+        self.assertEqual(self.client.get(other_url)["X-Cache"], "HIT")
+        detail = self.client.get(self.detail_url)
+        self.assertEqual(detail["X-Cache"], "MISS")
+        self.assertEqual(detail.json()["title"], "Alpha Revised")
+        listing = self.client.get(self.list_url)
+        self.assertEqual(listing["X-Cache"], "MISS")
+        self.assertIn("Alpha Revised", [item["title"] for item in listing.json()["results"]])
+
+    def test_delete_and_author_rename_invalidate_list(self):
+        self.client.get(self.list_url, {"search": "Renamed"})
+        self.author.name = "Renamed"
+        self.author.save()
+        resp = self.client.get(self.list_url, {"search": "Renamed"})
+        self.assertEqual(len(resp.json()["results"]), 2)
+
+        self.other.delete()
+        resp = self.client.get(self.list_url, {"search": "Renamed"})
+        self.assertEqual(len(resp.json()["results"]), 1)
+
+    def test_cache_varies_on_authentication(self):
+        self.client.get(self.list_url)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(self.list_url)["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(self.list_url)["X-Cache"], "HIT")
+
+    def test_missing_book_and_streams_not_cached(self):
+        missing = reverse("book-detail", kwargs={"pk": 999999})
+        self.client.get(missing)
+        self.assertEqual(self.client.get(missing).status_code, status.HTTP_404_NOT_FOUND)
+        resp = self.client.get(self.list_url, {"format": "ndjson"})
+        self.assertTrue(resp.streaming)
+        self.assertNotIn("X-Cache", resp)
+
+
+class BookConditionalRequestTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name="Author One")
+        cls.book = Book.objects.create(title="Alpha", publication_year=2000, author=cls.author)
+        Book.objects.create(title="Beta", publication_year=2001, author=cls.author)
+        cls.user = User.objects.create_user(username="etaguser", password="testpass123")
+        cls.list_url = reverse("book-list")
+        cls.detail_url = reverse("book-detail", kwargs={"pk": cls.book.pk})
+        cls.update_url = reverse("book-update", kwargs={"pk": cls.book.pk})
+
+    def test_detail_if_none_match_returns_304_without_loading_row(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp["ETag"], etag)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('"title"', ctx.captured_queries[0]["sql"])
+
+    def test_detail_etag_changes_on_update(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.book.title = "Alpha Revised"
+        self.book.save()
+        resp = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_cached_response_answers_conditional_get(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_depends_on_filters_and_data(self):
+        full = self.client.get(self.list_url)
+        filtered = self.client.get(self.list_url, {"publication_year": 2001})
+        self.assertNotEqual(full["ETag"], filtered["ETag"])
+
+        # Without a cached body the ETag still costs no query
+        with override_settings(API_CACHE_ENABLED=False), self.assertNumQueries(0):
+            resp = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=full["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Book.objects.filter(title="Beta").delete()
+        resp = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=full["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        # Author names decide search matches
+        etag = resp["ETag"]
+        self.author.name = "Author Renamed"
+        self.author.save()
+        self.assertNotEqual(self.client.get(self.list_url)["ETag"], etag)
+
+    def test_each_media_type_has_its_own_etag(self):
+        json_resp = self.client.get(self.list_url)
+        cache.clear()
+        resp = self.client.get(self.list_url, HTTP_ACCEPT="application/x-ndjson", HTTP_IF_NONE_MATCH=json_resp["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], json_resp["ETag"])
+        html = self.client.get(self.detail_url, HTTP_ACCEPT="text/html")
+        self.assertNotEqual(html["ETag"], self.client.get(self.detail_url)["ETag"])
+
+        # Negotiated responses, 304s included, say so to shared caches
+        for resp in (json_resp, html, self.client.get(self.list_url, HTTP_IF_NONE_MATCH=json_resp["ETag"])):
+            self.assertIn("Accept", resp["Vary"])
+
+    def test_update_etag_matches_later_read(self):
+        self.client.force_authenticate(self.user)
+        resp = self.client.patch(self.update_url, {"title": "Alpha 2"}, format="json")
+        self.assertEqual(resp["ETag"], self.client.get(self.detail_url)["ETag"])
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.detail_url)["Last-Modified"]
+        cache.clear()
+        resp = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_if_match(self):
+        self.client.force_authenticate(self.user)
+        etag = self.client.get(self.detail_url)["ETag"]
+        payload = {"title": "Alpha 2", "publication_year": 2000, "author": self.author.pk}
+
+        resp = self.client.put(self.update_url, payload, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp["ETag"], etag)
+
+        # The stale ETag now conflicts
+        payload["title"] = "Alpha 3"
+        resp = self.client.put(self.update_url, payload, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, "Alpha 2")
+
+
+class BookBulkCreateTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name="Author One")
+        cls.user = User.objects.create_user(username="bulkuser", password="testpass123")
+        cls.url = reverse("book-bulk-create")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def payload(self, count):
+        return [
+            {"title": f"Bulk {i}", "publication_year": 1990 + i, "author": self.author.pk}
+            for i in range(count)
+        ]
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        resp = self.client.post(self.url, self.payload(2), format="json")
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_inserts_in_batches(self):
+        with override_settings(API_BULK_BATCH_SIZE=2):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.post(self.url, self.payload(5), format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        created = resp.json()["created"]
+        self.assertEqual([book["title"] for book in created], [f"Bulk {i}" for i in range(5)])
+        self.assertTrue(all(book["id"] for book in created))
+        self.assertEqual(Book.objects.filter(title__startswith="Bulk").count(), 5)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "api_book"')]
+        self.assertEqual(len(inserts), 3)
+
+    def test_invalid_item_rejects_everything_by_default(self):
+        payload = self.payload(3)
+        payload[1]["publication_year"] = 9999
+        resp = self.client.post(self.url, payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error["index"] for error in resp.json()["errors"]], [1])
+        self.assertFalse(Book.objects.filter(title__startswith="Bulk").exists())
+
+    def test_partial_mode_keeps_valid_items(self):
+        payload = self.payload(4)
+        payload[0]["author"] = 999999
+        payload[2]["title"] = ""
+        resp = self.client.post(self.url + "?mode=partial", payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        body = resp.json()
+        self.assertEqual([book["title"] for book in body["created"]], ["Bulk 1", "Bulk 3"])
+        self.assertEqual([error["index"] for error in body["errors"]], [0, 2])
+        self.assertIn("author", body["errors"][0]["errors"])
+        self.assertEqual(Book.objects.filter(title__startswith="Bulk").count(), 2)
+
+    def test_rejects_non_list(self):
+        resp = self.client.post(self.url, self.payload(1)[0], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalidates_cached_list(self):
+        list_url = reverse("book-list")
+        self.client.get(list_url)
+        self.client.post(self.url, self.payload(2), format="json")
+        resp = self.client.get(list_url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(len(resp.json()["results"]), 2)
+
+    def test_created_books_are_searchable(self):
+        self.client.post(self.url, self.payload(2), format="json")
+        resp = self.client.get(reverse("book-list"), {"search": "bulk"})
+        self.assertEqual(len(resp.json()["results"]), 2)
+
+
+class BookBulkUpdateTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name="Author One")
+        cls.author2 = Author.objects.create(name="Author Two")
+        cls.books = [
+            Book.objects.create(title=f"Book {i}", publication_year=2000 + i, author=cls.author1)
+            for i in range(4)
+        ]
+        cls.user = User.objects.create_user(username="bulkupdater", password="testpass123")
+        cls.url = reverse("book-bulk-update")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(None)
+        resp = self.client.patch(self.url, [{"id": self.books[0].pk, "title": "X"}], format="json")
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_updates_only_touched_fields_in_one_statement(self):
+        payload = [{"id": book.pk, "title": f"Renamed {book.pk}"} for book in self.books]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.patch(self.url, payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.json()["updated"]), 4)
+
+        selects = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0]["sql"])
+        self.assertNotIn('"publication_year"', updates[0]["sql"])
+
+        for book in self.books:
+            book.refresh_from_db()
+            self.assertEqual(book.title, f"Renamed {book.pk}")
+
+    def test_mixed_fields_and_validation(self):
+        payload = [
+            {"id": self.books[0].pk, "publication_year": 1999},
+            {"id": self.books[1].pk, "author": self.author2.pk},
+        ]
+        resp = self.client.patch(self.url, payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.books[0].refresh_from_db()
+        self.books[1].refresh_from_db()
+        self.assertEqual(self.books[0].publication_year, 1999)
+        self.assertEqual(self.books[1].author, self.author2)
+
+    def test_errors_abort_by_default(self):
+        payload = [
+            {"id": self.books[0].pk, "title": "Changed"},
+            {"id": self.books[1].pk, "publication_year": 9999},
+            {"id": 999999, "title": "Missing"},
+            {"title": "No id"},
+        ]
+        resp = self.client.patch(self.url, payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error["index"] for error in resp.json()["errors"]], [1, 2, 3])
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].title, "Book 0")
+
+    def test_partial_mode_applies_valid_items(self):
+        payload = [
+            {"id": self.books[0].pk, "title": "Changed"},
+            {"id": self.books[0].pk, "title": "Duplicate"},
+        ]
+        resp = self.client.patch(self.url + "?mode=partial", payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual([error["index"] for error in resp.json()["errors"]], [1])
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].title, "Changed")
+
+    def test_invalidates_caches_and_etags(self):
+        detail_url = reverse("book-detail", kwargs={"pk": self.books[0].pk})
+        etag = self.client.get(detail_url)["ETag"]
+        self.client.patch(self.url, [{"id": self.books[0].pk, "title": "Fresh"}], format="json")
+        resp = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.json()["title"], "Fresh")
+
+
+class BookFastSerializationTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author1 = Author.objects.create(name="Chinua Achebe")
+        author2 = Author.objects.create(name="Ngugi wa Thiong'o")
+        for i, title in enumerate(["Arrow of God", "Arrow", "The River Between", "Petals of Blood"]):
+            Book.objects.create(
+                title=title, publication_year=1960 + i, author=author1 if i % 2 else author2
+            )
+        cls.list_url = reverse("book-list")
+        cls.detail_url = reverse("book-detail", kwargs={"pk": Book.objects.first().pk})
+
+    def fetch(self, url, params, fast):
+        cache.clear()
+        with override_settings(API_FAST_SERIALIZATION=fast):
+            resp = self.client.get(url, params)
+        return resp
+
+    def assertSameResponse(self, url, params=None):
+        regular = self.fetch(url, params or {}, fast=False)
+        fast = self.fetch(url, params or {}, fast=True)
+        self.assertEqual(fast.status_code, regular.status_code)
+        body = b"".join(fast.streaming_content) if fast.streaming else fast.content
+        expected = b"".join(regular.streaming_content) if regular.streaming else regular.content
+        self.assertEqual(body, expected)
+        return fast
+
+    def test_plan_compiled_from_serializer_fields(self):
+        self.assertEqual(
+            compile_field_plan(BookSerializer),
+            (("id", "id"), ("title", "title"), ("publication_year", "publication_year"),
+             ("author", "author_id")),
+        )
+        # Declared fields need the full serializer
+        self.assertIsNone(compile_field_plan(AuthorSerializer))
+
+    def test_list_output_identical(self):
+        self.assertSameResponse(self.list_url)
+        self.assertSameResponse(self.list_url, {"ordering": "-publication_year", "page_size": 2})
+        self.assertSameResponse(self.list_url, {"search": "arrow"})
+        self.assertSameResponse(self.list_url, {"format": "ndjson"})
+
+    def test_cursor_links_identical(self):
+        first = self.fetch(self.list_url, {"page_size": 1}, fast=False).json()
+        self.assertSameResponse(first["next"])
+
+    def test_detail_output_identical(self):
+        self.assertSameResponse(self.detail_url)
+        self.assertSameResponse(reverse("book-detail", kwargs={"pk": 999999}))
+
+    def test_fast_path_skips_model_instances(self):
+        with override_settings(API_FAST_SERIALIZATION=True):
+            with mock.patch.object(BookSerializer, "to_representation") as to_representation:
+                resp = self.client.get(self.list_url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        to_representation.assert_not_called()
+
+
+class BookBatchedAuthorValidationTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [Author.objects.create(name=f"Author {i}") for i in range(3)]
+        cls.book = Book.objects.create(title="Existing", publication_year=2000, author=cls.authors[0])
+        cls.user = User.objects.create_user(username="batchuser", password="testpass123")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def payload(self, count):
+        return [
+            {"title": f"Batch {i}", "publication_year": 2000, "author": self.authors[i % 3].pk}
+            for i in range(count)
+        ]
+
+    def author_selects(self, ctx):
+        return [q for q in ctx.captured_queries if 'FROM "api_author"' in q["sql"]]
+
+    def test_many_serializer_resolves_authors_in_one_query(self):
+        serializer = BookSerializer(data=self.payload(30), many=True)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(serializer.validated_data[4]["author"], self.authors[1])
+
+    def test_bulk_create_reports_missing_authors_once(self):
+        payload = self.payload(6)
+        payload[1]["author"] = 999998
+        payload[4]["author"] = 999999
+        payload[5]["author"] = 999999
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(reverse("book-bulk-create"), payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        body = resp.json()
+        self.assertEqual(body["missing"], {"author": [999998, 999999]})
+        self.assertEqual([error["index"] for error in body["errors"]], [1, 4, 5])
+        self.assertEqual(len(self.author_selects(ctx)), 1)
+
+    def test_bulk_create_query_count_independent_of_size(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post(reverse("book-bulk-create"), self.payload(40), format="json")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self.author_selects(ctx)), 1)
+
+    def test_bulk_update_resolves_authors_in_one_query(self):
+        others = Book.objects.bulk_create(
+            [Book(title=f"Other {i}", publication_year=2000, author=self.authors[0]) for i in range(5)]
+        )
+        payload = [{"id": book.pk, "author": self.authors[i % 3].pk} for i, book in enumerate(others)]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.patch(reverse("book-bulk-update"), payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.author_selects(ctx)), 1)
+        self.assertEqual(Book.objects.get(pk=others[2].pk).author, self.authors[2])
+
+    def test_single_book_validation_unchanged(self):
+        serializer = BookSerializer(data={"title": "One", "publication_year": 2000, "author": 999999})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("author", serializer.errors)
+        serializer = BookSerializer(data={"title": "One", "publication_year": 2000, "author": "x"})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("author", serializer.errors)
+
+
+class CachedTokenAuthenticationTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name="Author One")
+        cls.book = Book.objects.create(title="Alpha", publication_year=2000, author=cls.author)
+        cls.user = User.objects.create_user(username="tokenuser", password="testpass123")
+        cls.token = Token.objects.create(user=cls.user)
+        cls.url = reverse("book-update", kwargs={"pk": cls.book.pk})
+
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def patch(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.patch(self.url, {"title": "Alpha"}, format="json")
+        auth = [q for q in ctx.captured_queries if "authtoken_token" in q["sql"]]
+        return resp, auth
+
+    def test_hot_token_costs_no_queries(self):
+        resp, auth = self.patch()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(auth), 1)
+        resp, auth = self.patch()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(auth, [])
+
+    def test_shared_cache_used_when_process_cache_is_cold(self):
+        self.patch()
+        clear_token_cache()
+        resp, auth = self.patch()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(auth, [])
+
+    def test_deleted_token_rejected(self):
+        self.patch()
+        self.token.delete()
+        resp, _ = self.patch()
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.patch()
+        self.user.is_active = False
+        self.user.save()
+        resp, _ = self.patch()
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token not-a-real-token")
+        resp, _ = self.patch()
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncBookViewsTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name="Chinua Achebe")
+        cls.author2 = Author.objects.create(name="Ngugi wa Thiong'o")
+        cls.book1 = Book.objects.create(title="Arrow of God", publication_year=1964, author=cls.author1)
+        cls.book2 = Book.objects.create(title="The River Between", publication_year=1965, author=cls.author2)
+        cls.book3 = Book.objects.create(title="Petals of Blood", publication_year=1977, author=cls.author2)
+        cls.user = User.objects.create_user(username="asyncuser", password="testpass123")
+        cls.token = Token.objects.create(user=cls.user)
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_views_are_coroutines(self):
+        from asgiref.sync import iscoroutinefunction
+
+        for name in ("list", "create"):
+            match = resolve(reverse(f"async-book-{name}"))
+            self.assertTrue(iscoroutinefunction(match.func), name)
+        for name in ("detail", "update", "delete"):
+            match = resolve(reverse(f"async-book-{name}", kwargs={"pk": 1}))
+            self.assertTrue(iscoroutinefunction(match.func), name)
+
+    def test_list_matches_sync_view(self):
+        for params in ({}, {"ordering": "-publication_year"}, {"search": "river"},
+                       {"author": self.author2.pk, "page_size": 1}):
+            sync = self.client.get(reverse("book-list"), params).json()
+            async_ = self.client.get(reverse("async-book-list"), params).json()
+            self.assertEqual(async_["results"], sync["results"], params)
+
+    def test_list_cursor_pagination(self):
+        first = self.client.get(reverse("async-book-list"), {"page_size": 2}).json()
+        second = self.client.get(first["next"]).json()
+        ids = [item["id"] for item in first["results"] + second["results"]]
+        self.assertEqual(ids, [self.book1.pk, self.book3.pk, self.book2.pk])
+
+    def test_detail(self):
+        resp = self.client.get(reverse("async-book-detail", kwargs={"pk": self.book1.pk}))
+        self.assertEqual(resp.json()["title"], "Arrow of God")
+        resp = self.client.get(reverse("async-book-detail", kwargs={"pk": 999999}))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_require_authentication(self):
+        resp = self.client.post(
+            reverse("async-book-create"),
+            {"title": "New", "publication_year": 2000, "author": self.author1.pk},
+            format="json",
+        )
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        resp = self.client.delete(reverse("async-book-delete", kwargs={"pk": self.book1.pk}))
+        self.assertIn(resp.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+
+    def test_create_update_delete(self):
+        self.authenticate()
+        resp = self.client.post(
+            reverse("async-book-create"),
+            {"title": "Anthills of the Savannah", "publication_year": 1987, "author": self.author1.pk},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        pk = resp.json()["id"]
+
+        resp = self.client.patch(
+            reverse("async-book-update", kwargs={"pk": pk}), {"publication_year": 1988}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(Book.objects.get(pk=pk).publication_year, 1988)
+
+        resp = self.client.put(
+            reverse("async-book-update", kwargs={"pk": pk}),
+            {"title": "Future", "publication_year": 9999, "author": self.author1.pk},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        resp = self.client.delete(reverse("async-book-delete", kwargs={"pk": pk}))
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Book.objects.filter(pk=pk).exists())
+
+
+class BookCounterTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name="Chinua Achebe")
+        cls.author2 = Author.objects.create(name="Ngugi wa Thiong'o")
+        cls.book = Book.objects.create(title="Arrow of God", publication_year=1964, author=cls.author1)
+        Book.objects.create(title="Things Fall Apart", publication_year=1958, author=cls.author1)
+        cls.user = User.objects.create_user(username="counter", password="testpass123")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def assertCounts(self, authors, years):
+        self.assertEqual(
+            {a.pk: a.book_count for a in Author.objects.all()},
+            {self.author1.pk: authors[0], self.author2.pk: authors[1]},
+        )
+        stored = {row.year: row.book_count for row in BookYearCount.objects.all() if row.book_count}
+        self.assertEqual(stored, years)
+
+    def test_create_update_delete(self):
+        self.assertCounts((2, 0), {1958: 1, 1964: 1})
+        resp = self.client.post(
+            reverse("book-create"),
+            {"title": "Petals of Blood", "publication_year": 1977, "author": self.author2.pk},
+            format="json",
+        )
+        self.assertCounts((2, 1), {1958: 1, 1964: 1, 1977: 1})
+
+        # Reassigning and re-dating moves the book between counters
+        self.client.patch(
+            reverse("book-update", kwargs={"pk": self.book.pk}),
+            {"author": self.author2.pk, "publication_year": 1977},
+            format="json",
+        )
+        self.assertCounts((1, 2), {1958: 1, 1977: 2})
+
+        self.client.delete(reverse("book-delete", kwargs={"pk": resp.json()["id"]}))
+        self.assertCounts((1, 1), {1958: 1, 1977: 1})
+
+    def test_saving_a_stale_author_keeps_its_count(self):
+        author = Author.objects.get(pk=self.author1.pk)
+        Book.objects.create(title="No Longer at Ease", publication_year=1960, author=self.author1)
+        author.name = "C. Achebe"
+        author.save()
+        author.refresh_from_db()
+        self.assertEqual(author.name, "C. Achebe")
+        self.assertEqual(author.book_count, 3)
+        # Explicitly listing the counter does not write it either
+        author.book_count = 0
+        author.save(update_fields=["book_count"])
+        self.assertEqual(Author.objects.get(pk=author.pk).book_count, 3)
+
+    def test_title_change_leaves_counters_alone(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.patch(reverse("book-update", kwargs={"pk": self.book.pk}), {"title": "Arrow"}, format="json")
+        self.assertFalse([q for q in ctx.captured_queries if "book_count" in q["sql"]])
+        self.assertCounts((2, 0), {1958: 1, 1964: 1})
+
+    def test_failed_write_rolls_back_counters(self):
+        with mock.patch("api.serializers.invalidate", side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            self.client.post(
+                reverse("book-bulk-create"),
+                [{"title": "Petals of Blood", "publication_year": 1977, "author": self.author2.pk}],
+                format="json",
+            )
+        self.assertCounts((2, 0), {1958: 1, 1964: 1})
+
+    def test_bulk_create_and_update(self):
+        self.client.post(
+            reverse("book-bulk-create"),
+            [{"title": f"Bulk {i}", "publication_year": 1990, "author": self.author2.pk} for i in range(3)],
+            format="json",
+        )
+        self.assertCounts((2, 3), {1958: 1, 1964: 1, 1990: 3})
+        self.client.patch(
+            reverse("book-bulk-update"),
+            [{"id": self.book.pk, "author": self.author2.pk}, {"id": self.book.pk + 1, "title": "Renamed"}],
+            format="json",
+        )
+        self.assertCounts((1, 4), {1958: 1, 1964: 1, 1990: 3})
+
+    def test_async_views_keep_counts(self):
+        resp = self.client.post(
+            reverse("async-book-create"),
+            {"title": "Petals of Blood", "publication_year": 1977, "author": self.author2.pk},
+            format="json",
+        )
+        pk = resp.json()["id"]
+        self.client.patch(reverse("async-book-update", kwargs={"pk": pk}), {"author": self.author1.pk}, format="json")
+        self.assertCounts((3, 0), {1958: 1, 1964: 1, 1977: 1})
+        self.client.delete(reverse("async-book-delete", kwargs={"pk": pk}))
+        self.assertCounts((2, 0), {1958: 1, 1964: 1})
+
+    def test_author_list_reads_the_column(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("author-list"), {"ordering": "-book_count"})
+        self.assertEqual([a["book_count"] for a in resp.json()["results"]], [2, 0])
+        self.assertFalse([q for q in ctx.captured_queries if "COUNT(" in q["sql"]])
+
+
+class BookFacetTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name="Chinua Achebe")
+        cls.author2 = Author.objects.create(name="Ngugi wa Thiong'o")
+        Book.objects.create(title="Arrow of God", publication_year=1964, author=cls.author1)
+        Book.objects.create(title="Things Fall Apart", publication_year=1958, author=cls.author1)
+        Book.objects.create(title="No Longer at Ease", publication_year=1960, author=cls.author1)
+        Book.objects.create(title="The River Between", publication_year=1964, author=cls.author2)
+        cls.url = reverse("book-list")
+
+    def facet_queries(self, ctx):
+        return [q for q in ctx.captured_queries if "GROUP BY" in q["sql"]]
+
+    def test_facets_over_filtered_results(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, {"facets": "publication_year,author", "publication_year": 1964})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        body = resp.json()
+        self.assertEqual(len(body["results"]), 2)
+        self.assertEqual(body["facets"]["publication_year"], [{"value": 1964, "count": 2}])
+        self.assertEqual(
+            body["facets"]["author"],
+            [
+                {"value": self.author1.pk, "label": "Chinua Achebe", "count": 1},
+                {"value": self.author2.pk, "label": "Ngugi wa Thiong'o", "count": 1},
+            ],
+        )
+        # One grouped query per facet
+        self.assertEqual(len(self.facet_queries(ctx)), 2)
+
+    def test_unfiltered_facets_read_counters(self):
+        with CaptureQueriesContext(connection) as ctx:
+            body = self.client.get(self.url, {"facets": "publication_year,author", "page_size": 1}).json()
+        self.assertEqual(len(body["results"]), 1)
+        self.assertEqual(body["facets"]["publication_year"][0], {"value": 1964, "count": 2})
+        self.assertEqual([f["count"] for f in body["facets"]["author"]], [3, 1])
+        self.assertFalse(self.facet_queries(ctx))
+
+    def test_facets_with_search(self):
+        body = self.client.get(self.url, {"facets": "author", "search": "river"}).json()
+        self.assertEqual(body["facets"]["author"], [{"value": self.author2.pk, "label": "Ngugi wa Thiong'o", "count": 1}])
+
+    def test_counts_cached_per_filter_signature(self):
+        params = {"facets": "author", "author": self.author1.pk, "page_size": 1}
+        first = self.client.get(self.url, params).json()
+        # Another page and ordering of the same filter reuse the counts
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(self.url, {**params, "page_size": 2, "ordering": "-publication_year"}).json()
+        self.assertEqual(second["facets"], first["facets"])
+        self.assertFalse(self.facet_queries(ctx))
+
+        # A different filter is counted separately
+        other = self.client.get(self.url, {**params, "author": self.author2.pk}).json()
+        self.assertEqual(other["facets"]["author"][0]["count"], 1)
+
+    def test_writes_refresh_cached_counts(self):
+        params = {"facets": "publication_year", "publication_year": 1958}
+        self.assertEqual(self.client.get(self.url, params).json()["facets"]["publication_year"][0]["count"], 1)
+        Book.objects.create(title="A Man of the People", publication_year=1958, author=self.author1)
+        self.assertEqual(self.client.get(self.url, params).json()["facets"]["publication_year"][0]["count"], 2)
+
+    def test_no_facets_unless_asked(self):
+        self.assertNotIn("facets", self.client.get(self.url).json())
+
+    def test_unknown_facet(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, {"facets": "author,title"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("title", resp.json()["facets"][0])
+        self.assertFalse([q for q in ctx.captured_queries if "api_book" in q["sql"]])
+
+
+class BookSparseFieldsetTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name="Chinua Achebe")
+        cls.book1 = Book.objects.create(title="Arrow of God", publication_year=1964, author=cls.author)
+        cls.book2 = Book.objects.create(title="Things Fall Apart", publication_year=1958, author=cls.author)
+        cls.url = reverse("book-list")
+
+    def book_selects(self, ctx):
+        return [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('SELECT "api_book"."id"')]
+
+    def check_both_paths(self, check):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(API_FAST_SERIALIZATION=fast):
+                cache.clear()
+                check()
+
+    def test_fields_prune_output_and_columns(self):
+        def check():
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(self.url, {"fields": "id,title", "page_size": 1})
+            self.assertEqual(resp.json()["results"], [{"id": self.book1.pk, "title": "Arrow of God"}])
+            (sql,) = self.book_selects(ctx)
+            self.assertNotIn("publication_year", sql.split(" FROM ")[0])
+            self.assertNotIn("author_id", sql.split(" FROM ")[0])
+            # The cursor still pages through the pruned results
+            resp = self.client.get(resp.json()["next"])
+            self.assertEqual(resp.json()["results"], [{"id": self.book2.pk, "title": "Things Fall Apart"}])
+        self.check_both_paths(check)
+
+    def test_omit_keeps_sort_columns_selected(self):
+        def check():
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(self.url, {"fields": "id", "ordering": "-publication_year"})
+            self.assertEqual(resp.json()["results"], [{"id": self.book1.pk}, {"id": self.book2.pk}])
+            (sql,) = self.book_selects(ctx)
+            self.assertIn("publication_year", sql.split(" FROM ")[0])
+            self.assertNotIn("title", sql.split(" FROM ")[0])
+
+            resp = self.client.get(self.url, {"omit": "author,publication_year"})
+            self.assertEqual(resp.json()["results"][0], {"id": self.book1.pk, "title": "Arrow of God"})
+        self.check_both_paths(check)
+
+    def test_detail_and_streaming(self):
+        def check():
+            url = reverse("book-detail", kwargs={"pk": self.book1.pk})
+            self.assertEqual(self.client.get(url, {"fields": "title"}).json(), {"title": "Arrow of God"})
+            resp = self.client.get(self.url, {"fields": "id", "format": "ndjson"})
+            lines = b"".join(resp.streaming_content).decode().splitlines()
+            self.assertEqual([json.loads(line) for line in lines], [{"id": self.book1.pk}, {"id": self.book2.pk}])
+        self.check_both_paths(check)
+
+    def test_each_fieldset_has_its_own_etag(self):
+        url = reverse("book-detail", kwargs={"pk": self.book1.pk})
+        full = self.client.get(url)["ETag"]
+        sparse = self.client.get(url, {"fields": "title"})["ETag"]
+        self.assertNotEqual(full, sparse)
+        resp = self.client.get(url, {"fields": "title"}, HTTP_IF_NONE_MATCH=sparse)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_unknown_fields_rejected(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, {"fields": "id,isbn", "omit": "price"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("isbn", resp.json()["fields"][0])
+        self.assertIn("price", resp.json()["omit"][0])
+        self.assertFalse([q for q in ctx.captured_queries if "api_book" in q["sql"]])
+
+        resp = self.client.get(reverse("book-detail", kwargs={"pk": self.book1.pk}), {"fields": "isbn"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(self.url, {"fields": "id", "omit": "id"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookRangeFilterTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [Author.objects.create(name=f"Author {i}") for i in range(4)]
+        for i in range(40):
+            Book.objects.create(
+                title=f"{['River', 'rivet', 'Arrow', 'Song'][i % 4]} {i:02d}",
+                publication_year=1980 + i,
+                author=cls.authors[i % 4],
+            )
+        cls.url = reverse("book-list")
+
+    def titles(self, params):
+        resp = self.client.get(self.url, {**params, "page_size": 100})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        return [book["title"] for book in resp.json()["results"]]
+
+    def plan(self, params, ordering=("title", "id")):
+        queryset = BookFilter(params, queryset=Book.objects.all()).qs.order_by(*ordering)
+        return queryset.explain()
+
+    def assertSeeks(self, plan, index):
+        self.assertIn(f"SEARCH api_book USING INDEX {index}", plan)
+        self.assertNotIn("SCAN api_book", plan)
+
+    def test_year_range(self):
+        titles = self.titles({"publication_year__gte": 1990, "publication_year__lte": 1993})
+        self.assertEqual(titles, ["Arrow 10", "River 12", "Song 11", "rivet 13"])
+        self.assertEqual(self.titles({"publication_year__gte": 2018}), ["Arrow 38", "Song 39"])
+
+    def test_author_set(self):
+        titles = self.titles({"author__in": f"{self.authors[0].pk},{self.authors[3].pk}", "publication_year__lte": 1987})
+        self.assertEqual(titles, ["River 00", "River 04", "Song 03", "Song 07"])
+        self.assertEqual(self.titles({"author__in": "999999"}), [])
+
+    def test_title_prefix_is_case_sensitive(self):
+        # SQLite's LIKE alone would also match "rivet"
+        self.assertEqual(self.titles({"title__startswith": "Riv"}), [f"River {i:02d}" for i in range(0, 40, 4)])
+        self.assertEqual(len(self.titles({"title__startswith": "riv"})), 10)
+        self.assertEqual(self.titles({"title__startswith": "Song 3"}), ["Song 31", "Song 35", "Song 39"])
+
+    def test_invalid_values(self):
+        for params in ({"publication_year__gte": "abc"}, {"author__in": "1,x"}):
+            resp = self.client.get(self.url, params)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_export_and_facets_use_the_filters(self):
+        resp = self.client.get(reverse("book-export"), {"publication_year__gte": 2017, "format": "jsonl"})
+        self.assertEqual(len(b"".join(resp.streaming_content).splitlines()), 3)
+        body = self.client.get(self.url, {"facets": "author", "author__in": self.authors[1].pk}).json()
+        self.assertEqual(body["facets"]["author"], [{"value": self.authors[1].pk, "label": "Author 1", "count": 10}])
+
+    def test_query_plans_seek_indexes(self):
+        self.assertSeeks(self.plan({"publication_year__gte": 1990, "publication_year__lte": 2000},
+                                   ("publication_year", "title", "id")), "book_year_title_idx")
+        self.assertSeeks(self.plan({"publication_year__gte": 1990}, ("-publication_year", "id")),
+                         "book_year_desc_idx")
+        self.assertSeeks(self.plan({"author__in": "1,2", "publication_year__gte": 1990}), "book_author_year_idx")
+        self.assertSeeks(self.plan({"title__startswith": "Riv"}), "book_title_idx")
+        self.assertIn("title>? AND title<?", self.plan({"title__startswith": "Riv"}))
+        # Without the range a plain startswith scans the table on SQLite
+        self.assertIn("SCAN api_book", Book.objects.filter(title__startswith="Riv").explain())
+
+
+class BookAutocompleteTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.achebe = Author.objects.create(name="Chinua Achebe")
+        cls.ngugi = Author.objects.create(name="Ngugi wa Thiong'o")
+        cls.arrow = Book.objects.create(title="Arrow of God", publication_year=1964, author=cls.achebe)
+        cls.river = Book.objects.create(title="The River Between", publication_year=1965, author=cls.ngugi)
+        cls.things = Book.objects.create(title="Things Fall Apart", publication_year=1958, author=cls.achebe)
+        cls.user = User.objects.create_user(username="typist", password="testpass123")
+        cls.url = reverse("book-autocomplete")
+
+    def setUp(self):
+        super().setUp()
+        # A fresh process-wide index per test, built from the test data
+        patcher = mock.patch.object(autocomplete, "index", autocomplete.PrefixIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        autocomplete.index.build()
+
+    def suggest(self, q, **params):
+        resp = self.client.get(self.url, {"q": q, **params})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        return [(item["type"], item["label"]) for item in resp.json()["results"]], resp["X-Autocomplete-Source"]
+
+    def test_prefix_matches_from_index_without_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            results, source = self.suggest("th")
+        self.assertEqual(source, "index")
+        self.assertEqual(results, [("book", "The River Between"), ("book", "Things Fall Apart")])
+        self.assertFalse([q for q in ctx.captured_queries if "api_book" in q["sql"] or "api_author" in q["sql"]])
+        # Case-insensitive, titles and author names together, limited
+        self.assertEqual(self.suggest("CHIN")[0], [("author", "Chinua Achebe")])
+        self.assertEqual(len(self.suggest("t", limit=1)[0]), 1)
+        self.assertEqual(self.suggest("zzz")[0], [])
+
+    def test_writes_update_index_after_commit(self):
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("book-create"),
+                {"title": "Petals of Blood", "publication_year": 1977, "author": self.ngugi.pk},
+                format="json",
+            )
+            self.client.patch(reverse("book-update", kwargs={"pk": self.arrow.pk}), {"title": "Anthills"}, format="json")
+            self.client.delete(reverse("book-delete", kwargs={"pk": self.things.pk}))
+            Author.objects.filter(pk=self.ngugi.pk).get().delete()
+        self.assertEqual(self.suggest("pet")[0], [])  # deleted with its author
+        self.assertEqual(self.suggest("an")[0], [("book", "Anthills")])
+        self.assertEqual(self.suggest("arr")[0], [])
+        self.assertEqual(self.suggest("th")[0], [])
+        self.assertEqual(self.suggest("n")[0], [])
+
+    def test_bulk_writes_update_index(self):
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("book-bulk-create"),
+                [{"title": f"Season {i}", "publication_year": 1966, "author": self.achebe.pk} for i in range(2)],
+                format="json",
+            )
+            self.client.patch(reverse("book-bulk-update"), [{"id": self.arrow.pk, "title": "Sea"}], format="json")
+        self.assertEqual(self.suggest("sea")[0], [("book", "Sea"), ("book", "Season 0"), ("book", "Season 1")])
+
+    def test_rolled_back_writes_are_not_indexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Book.objects.create(title="Ghost", publication_year=2000, author=self.achebe)
+                raise RuntimeError
+        self.assertEqual(self.suggest("gho")[0], [])
+
+    def test_memory_cap_falls_back_to_indexed_queries(self):
+        with override_settings(API_AUTOCOMPLETE_MAX_BYTES=1000), self.assertLogs("api.autocomplete", "WARNING"):
+            self.assertFalse(autocomplete.index.build())
+            with CaptureQueriesContext(connection) as ctx:
+                results, source = self.suggest("th")
+        self.assertEqual(source, "database")
+        self.assertEqual(results, [("book", "The River Between"), ("book", "Things Fall Apart")])
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(self.suggest("chin")[0], [("author", "Chinua Achebe")])
+
+    def test_oversized_catalog_is_not_rescanned_until_it_shrinks(self):
+        with override_settings(API_AUTOCOMPLETE_MAX_BYTES=1000), self.assertLogs("api.autocomplete", "WARNING"):
+            self.assertFalse(autocomplete.index.build())
+            with mock.patch.object(autocomplete.index, "build") as build:
+                autocomplete.warm()
+                build.assert_not_called()
+                self.things.delete()
+                autocomplete.warm()
+                build.assert_called_once()
+
+    def test_database_fallback_matches_index(self):
+        for title in ("THE END", "the beginning", "Thebes", "Theory", "\u00c9t\u00e9"):
+            Book.objects.create(title=title, publication_year=2000, author=self.achebe)
+        autocomplete.index.build()
+        for prefix in ("th", "THE", "the b", "thE", "\u00e9", "\u00c9t", "n", "zz"):
+            for limit in (1, 3, 10):
+                indexed = autocomplete.suggest(prefix, limit)
+                self.assertEqual(indexed[1], "index")
+                self.assertEqual(autocomplete.database_suggestions(prefix, limit), indexed[0], (prefix, limit))
+
+    def test_growing_past_the_cap_disables_index(self):
+        size = autocomplete.index.size
+        with override_settings(API_AUTOCOMPLETE_MAX_BYTES=size + 10), self.assertLogs("api.autocomplete", "WARNING"):
+            autocomplete.index.put(autocomplete.BOOK, 999999, "Overflow")
+        self.assertFalse(autocomplete.index.ready)
+        self.assertEqual(self.suggest("arr"), ([("book", "Arrow of God")], "database"))
+
+    def test_writes_during_a_rebuild_are_kept(self):
+        entry_size = autocomplete.entry_size
+        reads = []
+
+        def commit_while_reading(key, label):
+            # Signals from other threads land after the first rows were read
+            reads.append(key)
+            if len(reads) == 1:
+                autocomplete.index.put(autocomplete.BOOK, 999999, "Anthills")
+                autocomplete.index.remove(autocomplete.BOOK, self.things.pk)
+            return entry_size(key, label)
+
+        with mock.patch("api.autocomplete.entry_size", commit_while_reading):
+            self.assertTrue(autocomplete.index.build())
+        self.assertEqual(self.suggest("an")[0], [("book", "Anthills")])
+        self.assertEqual(self.suggest("th")[0], [("book", "The River Between")])
+
+    def test_stale_index_is_rebuilt_in_background(self):
+        with override_settings(API_AUTOCOMPLETE_MAX_AGE=0), mock.patch("api.autocomplete.threading.Thread") as thread:
+            _, source = self.suggest("arr")
+        # The current index keeps answering meanwhile
+        self.assertEqual(source, "index")
+        thread.return_value.start.assert_called_once()
+        # Only one rebuild at a time
+        with override_settings(API_AUTOCOMPLETE_MAX_AGE=0), mock.patch("api.autocomplete.threading.Thread") as thread:
+            self.suggest("arr")
+        thread.assert_not_called()
+
+    def test_invalid_parameters(self):
+        for params in ({}, {"q": " "}, {"q": "x" * 101}, {"q": "a", "limit": "many"}):
+            resp = self.client.get(self.url, params)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class ServerTimingTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name="Chinua Achebe")
+        Book.objects.create(title="Arrow of God", publication_year=1964, author=cls.author)
+        Book.objects.create(title="Things Fall Apart", publication_year=1958, author=cls.author)
+        cls.staff = User.objects.create_user(username="staff", password="testpass123", is_staff=True)
+        cls.staff_token = Token.objects.create(user=cls.staff)
+        cls.user = User.objects.create_user(username="plain", password="testpass123")
+        cls.user_token = Token.objects.create(user=cls.user)
+
+    @staticmethod
+    def timings(resp):
+        return {
+            entry.split(";")[0].strip(): entry
+            for entry in resp.headers.get("Server-Timing", "").split(",") if entry
+        }
+
+    def test_disabled_by_default(self):
+        resp = self.client.get(reverse("book-list"))
+        self.assertNotIn("Server-Timing", resp.headers)
+
+    @override_settings(API_SERVER_TIMING=True, API_SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_sampled_request_reports_phases_and_logs(self):
+        with self.assertLogs("api.timing", level="INFO") as logs:
+            resp = self.client.get(reverse("book-list"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        timings = self.timings(resp)
+        for name in ("db", "db-slowest", "view", "serialize", "render", "total"):
+            self.assertIn(name, timings)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], reverse("book-list"))
+        self.assertEqual(record["status"], 200)
+        self.assertGreaterEqual(record["queries"], 1)
+        self.assertIn(f'desc="{record["queries"]} queries"', timings["db"])
+        self.assertIn("api_book", record["slowest_sql"])
+        # Statements are logged, never sent to the client
+        self.assertNotIn("SELECT", resp.headers["Server-Timing"])
+
+    @override_settings(API_SERVER_TIMING=True, API_SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_untouched(self):
+        resp = self.client.get(reverse("book-list"))
+        self.assertNotIn("Server-Timing", resp.headers)
+
+    def test_staff_header_enables_single_request(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.staff_token.key}")
+        with self.assertLogs("api.timing", level="INFO"):
+            resp = self.client.patch(
+                reverse("book-update", kwargs={"pk": Book.objects.first().pk}),
+                {"title": "Arrow of God"}, format="json", HTTP_X_SERVER_TIMING="1",
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn("auth", self.timings(resp))
+
+    def test_header_ignored_for_non_staff(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.user_token.key}")
+        resp = self.client.get(reverse("book-list"), HTTP_X_SERVER_TIMING="1")
+        self.assertNotIn("Server-Timing", resp.headers)
+        self.client.credentials()
+        resp = self.client.get(reverse("book-list"), HTTP_X_SERVER_TIMING="1")
+        self.assertNotIn("Server-Timing", resp.headers)
+
+    @override_settings(API_SERVER_TIMING=True, API_SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_async_view_queries_are_counted(self):
+        with self.assertLogs("api.timing", level="INFO") as logs:
+            resp = self.client.get(reverse("async-book-list"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertGreaterEqual(json.loads(logs.records[0].getMessage())["queries"], 1)
+
+
+class BookExportTestCase(CacheClearedAPITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author1 = Author.objects.create(name="Chinua Achebe")
+        cls.author2 = Author.objects.create(name="Ngugi wa Thiong'o")
+        Book.objects.create(title="Things Fall Apart", publication_year=1958, author=cls.author1)
+        Book.objects.create(title="Arrow of God", publication_year=1964, author=cls.author1)
+        Book.objects.create(title="The River Between", publication_year=1965, author=cls.author2)
+        cls.url = reverse("book-export")
+
+    @staticmethod
+    def content(resp):
+        return b"".join(resp.streaming_content)
+
+    def test_csv_by_default(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Type"], "text/csv")
+        self.assertIn('filename="books.csv"', resp["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(self.content(resp).decode())))
+        self.assertEqual([row["title"] for row in rows], ["Arrow of God", "The River Between", "Things Fall Apart"])
+        self.assertEqual(rows[0]["author_name"], "Chinua Achebe")
+        self.assertEqual(rows[0]["publication_year"], "1964")
+
+    def test_jsonl_honours_filters_and_ordering(self):
+        resp = self.client.get(self.url, {"format": "jsonl", "author": self.author1.pk, "ordering": "-publication_year"})
+        rows = [json.loads(line) for line in self.content(resp).splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Arrow of God", "Things Fall Apart"])
+        self.assertEqual(rows[0]["author"], self.author1.pk)
+
+    def test_search(self):
+        resp = self.client.get(self.url, {"format": "jsonl", "search": "ngugi"})
+        rows = [json.loads(line) for line in self.content(resp).splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["The River Between"])
+
+    def test_single_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.content(self.client.get(self.url))
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_gzip_when_accepted(self):
+        resp = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", resp["Vary"])
+        body = gzip.decompress(self.content(resp)).decode()
+        self.assertEqual(body, self.content(self.client.get(self.url)).decode())
+
+    def test_invalid_filter(self):
+        resp = self.client.get(self.url, {"publication_year": "abc"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(API_READ_REPLICAS=["replica"])
+class ReadReplicaRoutingTestCase(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        clear_token_cache()
+        self.author = Author.objects.create(name="Chinua Achebe")
+        self.book = Book.objects.create(title="Arrow of God", publication_year=1964, author=self.author)
+        self.user = User.objects.create_user(username="writer", password="testpass123")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+
+    def book_queries(self, method, *args, **kwargs):
+        """(response, api_book queries on the primary, ... on the replica)"""
+        with CaptureQueriesContext(connections["default"]) as primary, \
+                CaptureQueriesContext(connections["replica"]) as replica:
+            resp = getattr(self.client, method)(*args, **kwargs)
+        count = lambda ctx: sum("api_book" in q["sql"] for q in ctx.captured_queries)
+        return resp, count(primary), count(replica)
+
+    def test_list_and_detail_read_from_replica(self):
+        for url in (reverse("book-list"), reverse("book-detail", kwargs={"pk": self.book.pk}),
+                    reverse("author-list"), reverse("author-detail", kwargs={"pk": self.author.pk})):
+            resp, primary, replica = self.book_queries("get", url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, url)
+            self.assertEqual(primary, 0, url)
+            self.assertGreater(replica, 0, url)
+
+    def test_writer_is_pinned_to_primary(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        resp, primary, replica = self.book_queries(
+            "patch", reverse("book-update", kwargs={"pk": self.book.pk}), {"title": "Arrow"}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(replica, 0)
+        self.assertIn("X-Primary-Until", resp.headers)
+        self.assertIn("api_primary_until", resp.cookies)
+
+        # The cookie keeps the next read on the primary
+        resp, primary, replica = self.book_queries("get", reverse("book-list"))
+        self.assertEqual(resp.json()["results"][0]["title"], "Arrow")
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_pin_header_and_expiry(self):
+        _, primary, replica = self.book_queries(
+            "get", reverse("book-list"), HTTP_X_PRIMARY_UNTIL=str(time.time() + 60)
+        )
+        self.assertEqual((primary > 0, replica), (True, 0))
+        cache.clear()
+        _, primary, replica = self.book_queries(
+            "get", reverse("book-list"), HTTP_X_PRIMARY_UNTIL=str(time.time() - 1)
+        )
+        self.assertEqual((primary, replica > 0), (0, True))
+
+    def test_replica_responses_are_not_cached_right_after_a_write(self):
+        self.client.get(reverse("book-list"))
+        resp, primary, replica = self.book_queries("get", reverse("book-list"))
+        self.assertNotIn("X-Cache", resp.headers)
+        self.assertGreater(replica, 0)
+
+    def test_replica_responses_are_cached_once_replicas_caught_up(self):
+        # No write within the replica lag bound
+        with override_settings(API_READ_YOUR_WRITES_WINDOW=0):
+            url = reverse("book-detail", kwargs={"pk": self.book.pk})
+            self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+            resp, primary, replica = self.book_queries("get", url)
+            self.assertEqual(resp["X-Cache"], "HIT")
+            self.assertEqual((primary, replica), (0, 0))
+
+            self.book.title = "Arrow"
+            self.book.save()
+            self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+    def test_streamed_bodies_read_from_replica(self):
+        for url, params in ((reverse("book-list"), {"format": "ndjson"}), (reverse("book-export"), {})):
+            with CaptureQueriesContext(connections["default"]) as primary, \
+                    CaptureQueriesContext(connections["replica"]) as replica:
+                resp = self.client.get(url, params)
+                body = b"".join(resp.streaming_content)
+            self.assertIn(b"Arrow of God", body)
+            self.assertFalse([q for q in primary.captured_queries if "api_book" in q["sql"]], url)
+            self.assertTrue([q for q in replica.captured_queries if "api_book" in q["sql"]], url)
+
+    def test_no_pin_without_replicas(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        with override_settings(API_READ_REPLICAS=[]):
+            resp = self.client.patch(
+                reverse("book-update", kwargs={"pk": self.book.pk}), {"title": "Arrow"}, format="json"
+            )
+        self.assertNotIn("X-Primary-Until", resp.headers)
+
+
+class ReplicaSelectionTestCase(SimpleTestCase):
+
+    @override_settings(API_READ_REPLICAS=["r1", "r2", "r3"])
+    def test_round_robin(self):
+        picks = [replicas.choose_replica() for _ in range(6)]
+        self.assertEqual(len(set(picks)), 3)
+        self.assertEqual(picks[:3], picks[3:])
+
+    @override_settings(API_READ_REPLICAS=["r1", "r2"], API_REPLICA_SELECTION="least-load")
+    def test_least_load(self):
+        request = RequestFactory().get("/")
+        with replicas.replica_reads(request) as busy:
+            # The other replica has nothing in flight
+            for _ in range(3):
+                self.assertNotEqual(replicas.choose_replica(), busy)
+        self.assertEqual(replicas._in_flight[busy], 0)
+
+    def test_writes_and_other_apps_use_primary(self):
+        router = replicas.ReplicaRouter()
+        with override_settings(API_READ_REPLICAS=["r1"]):
+            with replicas.replica_reads(RequestFactory().get("/")):
+                self.assertEqual(router.db_for_read(Book), "r1")
+                self.assertIsNone(router.db_for_read(User))
+                self.assertEqual(router.db_for_write(Book), "default")
+            with replicas.replica_reads(RequestFactory().post("/")):
+                self.assertIsNone(router.db_for_read(Book))
+            self.assertFalse(router.allow_migrate("r1", "api"))
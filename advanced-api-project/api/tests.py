@@ -1,3 +1,350 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import types
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import include, path, reverse
+
+from . import urls
+from .bulk import insert_rows
+from .management.commands.import_books import Command as ImportBooksCommand
+from .models import Author, Book, BookYearCount, ImportCheckpoint
+
+
+class IndexReportCommandTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name="Chinua Achebe")
+        Book.objects.create(title="Things Fall Apart", publication_year=1958, author=author)
+
+    def test_list_queries_use_book_indexes(self):
+        out = StringIO()
+        call_command("index_report", "--json", stdout=out)
+        report = {entry["endpoint"]: entry for entry in json.loads(out.getvalue())}
+
+        def indexes(name):
+            return {idx for query in report[name]["queries"] for idx in query["indexes"]}
+
+        self.assertIn("book_title_idx", indexes("list"))
+        self.assertIn("book_year_desc_idx", indexes("list by year desc"))
+        self.assertIn("book_year_title_idx", indexes("list filtered by year"))
+        self.assertIn("book_author_year_idx", indexes("list by author and year"))
+        self.assertTrue(all(entry["status"] == 200 for entry in report.values()))
+
+
+class BenchmarkCommandTestCase(TestCase):
+
+    def benchmark(self, *routes):
+        out = StringIO()
+        call_command(
+            "benchmark_api", "--use-current-db", "--scales", "30", "--requests", "3",
+            "--concurrency", "1", "--routes", *routes, stdout=out, stderr=StringIO(),
+        )
+        return json.loads(out.getvalue())
+
+    def test_reports_each_route_as_json(self):
+        routes = {"book-list", "book-detail", "book-create", "book-export", "book-autocomplete", "async-book-delete"}
+        report = self.benchmark(*routes)
+        self.assertEqual(report["meta"]["concurrency"], 1)
+        results = {result["route"]: result for result in report["results"]}
+        self.assertEqual(set(results), routes)
+        for result in results.values():
+            self.assertEqual(result["scale"], 30)
+            self.assertEqual(result["requests"], 3)
+            self.assertEqual(result["errors"], 0)
+            self.assertGreater(result["queries"], 0)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        self.assertEqual(results["book-create"]["status"], 201)
+        self.assertEqual(results["async-book-delete"]["status"], 204)
+        # Seeded (and created) books are counted
+        self.assertEqual(sum(Author.objects.values_list("book_count", flat=True)), Book.objects.count())
+
+    def test_async_routes_skipped_when_not_mounted(self):
+        # What API_ASYNC_VIEWS = "off" mounts
+        urlconf = types.ModuleType("sync_urls")
+        urlconf.urlpatterns = [path("api/", include([p for p in urls.urlpatterns if str(p.pattern) != "async/"]))]
+        with override_settings(ROOT_URLCONF=urlconf):
+            report = self.benchmark("book-list", "async-book-list")
+        self.assertEqual([result["route"] for result in report["results"]], ["book-list"])
+        self.assertEqual(report["results"][0]["errors"], 0)
+
+
+# The ASGI runner serves sync views from a worker thread, which only sees
+# committed rows
+class BenchmarkCommandASGITestCase(TransactionTestCase):
+
+    def test_asgi_requests_are_authenticated(self):
+        out = StringIO()
+        call_command(
+            "benchmark_api", "--use-current-db", "--scales", "30", "--requests", "3", "--interface", "asgi",
+            "--routes", "book-create", "async-book-create", stdout=out, stderr=StringIO(),
+        )
+        for result in json.loads(out.getvalue())["results"]:
+            self.assertEqual(result["errors"], 0, result["route"])
+
+
+class SeedCatalogCommandTestCase(TestCase):
+
+    def seed(self, *args):
+        call_command("seed_catalog", "--books", "400", "--authors", "20", *args, stdout=StringIO())
+        return list(Book.objects.order_by("id").values_list("title", "publication_year", "author__name"))
+
+    def test_same_seed_same_catalog(self):
+        first = self.seed("--seed", "7")
+        self.assertEqual(len(first), 400)
+        self.assertEqual(Author.objects.count(), 20)
+        self.assertEqual(self.seed("--seed", "7", "--clear"), first)
+        self.assertEqual(self.seed("--seed", "7", "--clear", "--method", "bulk"), first)
+        self.assertNotEqual(self.seed("--seed", "8", "--clear"), first)
+
+    def test_distributions(self):
+        self.seed("--years", "2000", "2009", "--year-skew", "0", "--title-words", "2", "2",
+                  "--author-skew", "2")
+        years = list(Book.objects.values_list("publication_year", flat=True))
+        self.assertEqual(set(years), set(range(2000, 2010)))
+        self.assertTrue(all(len(title.split()) == 2 for title in Book.objects.values_list("title", flat=True)))
+        counts = sorted(Author.objects.annotate(n=Count("books")).values_list("n", flat=True))
+        # Zipf: the most prolific author has far more books than the median one
+        self.assertGreater(counts[-1], 10 * max(counts[len(counts) // 2], 1))
+
+    def test_clear_drops_cached_book_details(self):
+        self.seed()
+        url = reverse("book-detail", kwargs={"pk": Book.objects.order_by("id").first().pk})
+        cache.clear()
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+        self.seed("--clear")
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_seeded_books_are_searchable(self):
+        self.seed()
+        word = Book.objects.first().title.split()[0]
+        resp = self.client.get(reverse("book-list"), {"search": word, "page_size": 1000})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            len(resp.json()["results"]),
+            Book.objects.filter(Q(title__icontains=word) | Q(author__name__icontains=word)).count(),
+        )
+
+
+class ImportBooksCommandTestCase(TestCase):
+    CSV = (
+        "title,publication_year,author\n"
+        "Things Fall Apart,1958,Chinua Achebe\n"
+        "Arrow of God,1964,Chinua Achebe\n"
+        "Petals of Blood,not-a-year,Ngugi wa Thiong'o\n"
+        "The River Between,1965,Ngugi wa Thiong'o\n"
+        "Future Book,9999,Nobody\n"
+    )
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as fh:
+            fh.write(content)
+        return path
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command("import_books", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_csv_import_reuses_existing_authors_and_rejects_bad_rows(self):
+        existing = Author.objects.create(name="Chinua Achebe")
+        rejects = os.path.join(self.dir, "rejects.jsonl")
+        out = self.run_import(self.write("books.csv", self.CSV), "--rejects", rejects)
+
+        self.assertIn("Imported 3 books (1 new authors), rejected 2 of 5 records", out)
+        self.assertEqual(Author.objects.filter(name="Chinua Achebe").count(), 1)
+        self.assertEqual(existing.books.count(), 2)
+        with open(rejects) as fh:
+            rejected = [json.loads(line) for line in fh]
+        self.assertEqual([r["record"] for r in rejected], [3, 5])
+        self.assertEqual(rejected[0]["reason"], "publication_year must be an integer")
+
+    def test_jsonl_from_stdin(self):
+        lines = [
+            json.dumps({"title": "Half of a Yellow Sun", "publication_year": 2006, "author": "Chimamanda Adichie"}),
+            "not json",
+            "",
+            json.dumps({"title": "Purple Hibiscus", "publication_year": 2003, "author": "Chimamanda Adichie"}),
+        ]
+        with mock.patch("sys.stdin", StringIO("\n".join(lines) + "\n")):
+            out = self.run_import("-", "--format", "jsonl")
+        self.assertIn("Imported 2 books", out)
+        self.assertEqual(Author.objects.get().books.count(), 2)
+
+    def test_imported_books_are_searchable(self):
+        self.run_import(self.write("books.csv", self.CSV))
+        resp = self.client.get(reverse("book-list"), {"search": "river"})
+        self.assertEqual([b["title"] for b in resp.json()["results"]], ["The River Between"])
+
+    def read_rejects(self, path):
+        with open(path) as fh:
+            return [json.loads(line)["record"] for line in fh]
+
+    def test_resume_after_interruption(self):
+        path = self.write("books.csv", self.CSV)
+        rejects = os.path.join(self.dir, "rejects.jsonl")
+        args = [path, "--batch-size", "2", "--checkpoint", "partner", "--rejects", rejects]
+        real_insert = insert_rows
+        calls = []
+
+        def failing_insert(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return real_insert(*args)
+
+        with mock.patch("api.management.commands.import_books.insert_rows", failing_insert):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import(*args)
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get(name="partner").stats["record"], 2)
+        # Record 3 was rejected in the batch that never committed
+        self.assertEqual(self.read_rejects(rejects), [3])
+
+        out = self.run_import(*args, "--resume")
+        self.assertIn("Imported 3 books", out)
+        self.assertEqual(
+            sorted(Book.objects.values_list("title", flat=True)),
+            ["Arrow of God", "The River Between", "Things Fall Apart"],
+        )
+        self.assertEqual(self.read_rejects(rejects), [3, 5])
+
+    def test_crash_before_checkpoint_rolls_back_batch(self):
+        path = self.write("books.csv", self.CSV)
+        args = [path, "--batch-size", "2", "--checkpoint", "partner"]
+        real_save = ImportBooksCommand.save_checkpoint
+        calls = []
+
+        def crashing_save(command):
+            calls.append(command)
+            if len(calls) == 2:
+                # Killed with the second batch written but not yet recorded
+                raise KeyboardInterrupt
+            real_save(command)
+
+        with mock.patch.object(ImportBooksCommand, "save_checkpoint", crashing_save):
+            with self.assertRaises(KeyboardInterrupt):
+                self.run_import(*args)
+        self.assertEqual(Book.objects.count(), 2)
+
+        self.run_import(*args, "--resume")
+        self.assertEqual(Book.objects.count(), 3)
+        self.assertEqual(Author.objects.get(name="Chinua Achebe").book_count, 2)
+
+    def test_checkpoint_must_match_source(self):
+        ImportCheckpoint.objects.create(name="partner", stats={"source": "other.csv", "record": 1})
+        with self.assertRaises(CommandError):
+            self.run_import(self.write("books.csv", self.CSV), "--checkpoint", "partner", "--resume")
+
+
+class ExportBooksCommandTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name="Chinua Achebe")
+        Book.objects.create(title="Things Fall Apart", publication_year=1958, author=author)
+        Book.objects.create(title="Arrow of God", publication_year=1964, author=author)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def test_gzipped_jsonl_with_filters_matches_endpoint(self):
+        path = os.path.join(self.dir, "books.jsonl.gz")
+        call_command("export_books", "publication_year=1964", "--output", path, stderr=StringIO())
+        with gzip.open(path) as fh:
+            exported = fh.read()
+        resp = self.client.get(reverse("book-export"), {"format": "jsonl", "publication_year": 1964})
+        self.assertEqual(exported, b"".join(resp.streaming_content))
+        self.assertEqual(json.loads(exported)["title"], "Arrow of God")
+
+    def test_csv_format_from_extension(self):
+        path = os.path.join(self.dir, "books.csv")
+        call_command("export_books", "--output", path, stderr=StringIO())
+        with open(path) as fh:
+            self.assertEqual(len(fh.read().splitlines()), 3)
+
+    def test_invalid_parameters(self):
+        with self.assertRaisesMessage(CommandError, "publication_year"):
+            call_command("export_books", "publication_year=abc", "--output", os.devnull)
+
+
+class RepairCountersCommandTestCase(TestCase):
+
+    def test_recounts_after_raw_writes(self):
+        author = Author.objects.create(name="Chinua Achebe")
+        other = Author.objects.create(name="Nobody")
+        Book.objects.create(title="Arrow of God", publication_year=1964, author=author)
+        # Raw SQL skips the counters entirely
+        insert_rows(connection, Book, ["title", "publication_year", "author"], [("Things Fall Apart", 1958, author.pk)])
+        Author.objects.filter(pk=other.pk).update(book_count=7)
+        BookYearCount.objects.create(year=1900, book_count=3)
+
+        out = StringIO()
+        call_command("repair_counters", stdout=out)
+        self.assertIn("Fixed 2 author counts and 2 year counts", out.getvalue())
+        self.assertEqual(Author.objects.get(pk=author.pk).book_count, 2)
+        self.assertEqual(Author.objects.get(pk=other.pk).book_count, 0)
+        self.assertEqual(dict(BookYearCount.objects.values_list("year", "book_count")), {1958: 1, 1964: 1})
+
+        out = StringIO()
+        call_command("repair_counters", stdout=out)
+        self.assertIn("Fixed 0 author counts and 0 year counts", out.getvalue())
+
+    def test_import_and_seed_keep_counts(self):
+        path = os.path.join(tempfile.mkdtemp(), "books.jsonl")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, "w") as fh:
+            fh.write('{"title": "Arrow of God", "publication_year": 1964, "author": "Chinua Achebe"}\n')
+            fh.write('{"title": "Things Fall Apart", "publication_year": 1958, "author": "Chinua Achebe"}\n')
+        call_command("import_books", path, stdout=StringIO())
+        self.assertEqual(Author.objects.get(name="Chinua Achebe").book_count, 2)
+
+        call_command("seed_catalog", "--books", "300", "--authors", "10", "--seed", "1", stdout=StringIO())
+        out = StringIO()
+        call_command("repair_counters", stdout=out)
+        self.assertIn("Fixed 0 author counts and 0 year counts", out.getvalue())
+        self.assertEqual(sum(BookYearCount.objects.values_list("book_count", flat=True)), 302)
+
+
+class SQLiteConfigurationTestCase(TestCase):
+
+    def test_connections_use_configured_pragmas(self):
+        # The test database lives in memory, where journal_mode stays "memory"
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS["cache_size"])
+
+    def test_benchmark_compares_stock_and_tuned(self):
+        out = StringIO()
+        call_command("benchmark_sqlite", "--rows", "200", "--threads", "2", "--seconds", "0.05",
+                     "--json", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertIn("PRAGMA journal_mode = WAL", report["pragmas"])
+        runs = {(r["config"], r["workload"]): r for r in report["results"]}
+        self.assertEqual(len(runs), 9)
+        self.assertGreater(runs[("tuned, persistent connections", "read")]["reads_per_s"], 0)
+        self.assertGreater(runs[("stock, connection per request", "write")]["writes_per_s"], 0)
+        mixed = runs[("tuned, persistent connections", "mixed")]
+        self.assertGreater(mixed["reads_per_s"], 0)
+        self.assertGreater(mixed["writes_per_s"], 0)
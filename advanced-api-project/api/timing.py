@@ -0,0 +1,179 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger("api.timing")
+
+# Header a staff user sends to get timings for one request regardless of sampling
+TIMING_HEADER = "X-Server-Timing"
+
+_current = ContextVar("api_request_timer", default=None)
+
+
+class RequestTimer:
+    """Phase durations and SQL statistics collected for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = None
+        self._open = set()
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def record_query(self, sql, seconds):
+        self.queries += 1
+        self.db_time += seconds
+        if seconds > self.slowest_time:
+            self.slowest_time, self.slowest_sql = seconds, sql
+
+    def server_timing(self, total):
+        entries = [f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"']
+        if self.queries:
+            entries.append(f"db-slowest;dur={self.slowest_time * 1000:.2f}")
+        entries += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+    def as_log_record(self, request, response, total):
+        return {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total * 1000, 2),
+            "queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 2),
+            "slowest_ms": round(self.slowest_time * 1000, 2),
+            "slowest_sql": self.slowest_sql,
+            "phases_ms": {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+        }
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as `name` when the current request is being
+    timed; nested blocks of the same name are only counted once.
+    """
+    timer = _current.get()
+    if timer is None or name in timer._open:
+        yield
+        return
+    timer._open.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer._open.discard(name)
+        timer.add(name, time.perf_counter() - started)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timer = _current.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.record_query(sql, time.perf_counter() - started)
+
+
+def instrument_connection(sender=None, connection=None, **kwargs):
+    """connection_created receiver installing the query timer on a connection"""
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+# Serializers whose `.data` should count towards the "serialize" phase
+class TimedSerializerMixin:
+
+    @property
+    def data(self):
+        with phase("serialize"):
+            return super().data
+
+
+# Records query count, DB time, the slowest statement and the auth / view /
+# serialize / render phases, returned as Server-Timing headers and logged as
+# one JSON line on the "api.timing" logger. Enabled for a sample of requests
+# with API_SERVER_TIMING, or for a single request by a staff user sending the
+# X-Server-Timing header. The slowest SQL text only goes to the log.
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer, sampled = self.start(request)
+        if timer is None:
+            return self.get_response(request)
+        token = _current.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timer, sampled)
+
+    async def __acall__(self, request):
+        timer, sampled = self.start(request)
+        if timer is None:
+            return await self.get_response(request)
+        token = _current.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timer, sampled)
+
+    def start(self, request):
+        sampled = (
+            getattr(settings, "API_SERVER_TIMING", False)
+            and random.random() < getattr(settings, "API_SERVER_TIMING_SAMPLE_RATE", 1.0)
+        )
+        # Requested timings are collected up front and only returned once the
+        # view has authenticated the user as staff
+        if sampled or TIMING_HEADER in request.headers:
+            request._timer_view_started = None
+            return RequestTimer(), sampled
+        return None, False
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if _current.get() is not None:
+            request._timer_view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called between the view returning and the response being rendered
+        timer = _current.get()
+        if timer is not None and getattr(request, "_timer_view_started", None) is not None:
+            now = time.perf_counter()
+            timer.add("view", now - request._timer_view_started)
+            request._timer_view_started = None
+            response.add_post_render_callback(lambda r: timer.add("render", time.perf_counter() - now))
+        return response
+
+    def finish(self, request, response, timer, sampled):
+        total = time.perf_counter() - timer.started
+        if request._timer_view_started is not None:
+            timer.add("view", time.perf_counter() - request._timer_view_started)
+        user = getattr(request, "user", None)
+        if not sampled and not getattr(user, "is_staff", False):
+            return response
+        response["Server-Timing"] = timer.server_timing(total)
+        logger.info(json.dumps(timer.as_log_record(request, response, total)))
+        return response
@@ -1,10 +1,18 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import include, path
+from . import async_views
 from .views import (
     BookListView,
     BookDetailView,
+    BookExportView,
+    BookAutocompleteView,
     BookCreateView,
+    BookBulkCreateView,
     BookUpdateView,
+    BookBulkUpdateView,
     BookDeleteView,
+    AuthorListView,
+    AuthorDetailView,
 )
 
 urlpatterns = [
@@ -14,12 +22,44 @@ urlpatterns = [
     # Retrieve a single book by ID
     path("books/<int:pk>/", BookDetailView.as_view(), name="book-detail"),
 
+    # Stream all matching books as CSV or JSON lines
+    path("books/export/", BookExportView.as_view(), name="book-export"),
+
+    # Title / author name suggestions for a search box
+    path("books/autocomplete/", BookAutocompleteView.as_view(), name="book-autocomplete"),
+
     # Create a new book
     path("books/create/", BookCreateView.as_view(), name="book-create"),
 
+    # Create many books at once
+    path("books/bulk/", BookBulkCreateView.as_view(), name="book-bulk-create"),
+
+    # Update many books at once
+    path("books/bulk/update/", BookBulkUpdateView.as_view(), name="book-bulk-update"),
+
     # Update an existing book
     path("books/update/<int:pk>/", BookUpdateView.as_view(), name="book-update"),
 
     # Delete a book
     path("books/delete/<int:pk>/", BookDeleteView.as_view(), name="book-delete"),
+
+    # List authors with book counts and their newest books
+    path("authors/", AuthorListView.as_view(), name="author-list"),
+
+    # Retrieve a single author
+    path("authors/<int:pk>/", AuthorDetailView.as_view(), name="author-detail"),
+]
+
+# Async (ASGI) versions of the book views
+async_urlpatterns = [
+    path("books/", async_views.AsyncBookListView.as_view(), name="async-book-list"),
+    path("books/<int:pk>/", async_views.AsyncBookDetailView.as_view(), name="async-book-detail"),
+    path("books/create/", async_views.AsyncBookCreateView.as_view(), name="async-book-create"),
+    path("books/update/<int:pk>/", async_views.AsyncBookUpdateView.as_view(), name="async-book-update"),
+    path("books/delete/<int:pk>/", async_views.AsyncBookDeleteView.as_view(), name="async-book-delete"),
 ]
+
+# API_ASYNC_VIEWS: "side-by-side" mounts the async views under /api/async/ next
+# to the sync ones so both can be benchmarked; "off" leaves them out.
+if getattr(settings, "API_ASYNC_VIEWS", "off") == "side-by-side":
+    urlpatterns.append(path("async/", include(async_urlpatterns)))
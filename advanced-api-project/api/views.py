@@ -1,102 +1,416 @@
-from django.urls import reverse
-from rest_framework import status
-from rest_framework.test import APITestCase
-from django.contrib.auth.models import User
-from .models import Book
-
-
-class BookAPITestCase(APITestCase):
-    def setUp(self):
-        # Create a user for authentication
-        self.user = User.objects.create_user(username="testuser", password="password123")
-        self.client.login(username="testuser", password="password123")
-
-        # Sample book
-        self.book = Book.objects.create(
-            title="Test Book",
-            author="John Doe",
-            publication_year=2010
+import re
+
+from django.db.models import F, Prefetch, Window
+from django.db.models.functions import RowNumber
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.settings import api_settings
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from django_filters import rest_framework as filters
+
+from . import autocomplete, counters
+from .cache import BOOKS, CATALOG, CachedResponseMixin, book_scope, invalidate
+from .conditional import (
+    ConditionalGetMixin,
+    book_validators,
+    evaluate_preconditions,
+    list_validators,
+    set_validators,
+)
+from .export import encode_rows, export_rows
+from .facets import FacetMixin
+from .fastpath import FastSerializationMixin, build_rows
+from .fieldsets import SparseFieldsetMixin
+from .filters import BookFilter
+from .models import Author, Book
+from .pagination import KeysetCursorPagination
+from .renderers import CSVRenderer, JSONLRenderer, NDJSONRenderer
+from .replicas import ReplicaReadMixin
+from .search import FTS5SearchFilter, RankedOrderingFilter
+from .serializers import AuthorSerializer, BookSerializer, preload_related_objects
+
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+
+# List all books with Filtering, Searching, and Ordering
+# (plus facet counts with ?facets=publication_year,author and sparse
+# fieldsets with ?fields= / ?omit=)
+class BookListView(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    FacetMixin,
+    SparseFieldsetMixin,
+    FastSerializationMixin,
+    generics.ListAPIView,
+):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    # Enable filtering, searching, and ordering
+    filter_backends = [filters.DjangoFilterBackend, FTS5SearchFilter, RankedOrderingFilter]
+
+    # Filtering (exact, range, set and prefix lookups; see api.filters)
+    filterset_class = BookFilter
+
+    # Searching (FTS5 index on SQLite, icontains on these fields otherwise)
+    search_fields = ['title', 'author__name']
+
+    # Ordering
+    ordering_fields = ['title', 'publication_year']
+    ordering = ['title']
+
+    # Keyset pagination over the active ordering (id breaks ties)
+    pagination_class = KeysetCursorPagination
+
+    # ?format=ndjson or Accept: application/x-ndjson streams every matching row
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+    stream_chunk_size = 2000
+
+    def get_validators(self, request):
+        return list_validators(request.GET.urlencode(), request.accepted_media_type)
+
+    def list(self, request, *args, **kwargs):
+        if isinstance(request.accepted_renderer, NDJSONRenderer):
+            queryset = self.filter_queryset(self.get_queryset())
+            return StreamingHttpResponse(
+                request.accepted_renderer.iter_lines(self.stream_rows(queryset)),
+                content_type=NDJSONRenderer.media_type,
+            )
+
+        plan = self.get_field_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(self.fast_values(plan, queryset))
+        return self.get_paginated_response(build_rows(plan, page))
+
+    def stream_rows(self, queryset):
+        plan = self.get_field_plan()
+        if plan is not None:
+            for row in self.fast_values(plan, queryset).iterator(chunk_size=self.stream_chunk_size):
+                yield {key: row[column] for key, column in plan}
+            return
+
+        # Serialize one chunk at a time so memory stays flat however many rows match
+        chunk = []
+        for book in queryset.iterator(chunk_size=self.stream_chunk_size):
+            chunk.append(book)
+            if len(chunk) == self.stream_chunk_size:
+                yield from self.get_serializer(chunk, many=True).data
+                chunk = []
+        if chunk:
+            yield from self.get_serializer(chunk, many=True).data
+
+
+# Retrieve a single book (?fields= / ?omit= as for the list)
+class BookDetailView(
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    SparseFieldsetMixin,
+    FastSerializationMixin,
+    generics.RetrieveAPIView,
+):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    # Only invalidated by writes to this book
+    def get_cache_scopes(self):
+        return [BOOKS, book_scope(self.kwargs['pk'])]
+
+    def get_validators(self, request):
+        return book_validators(
+            self.get_queryset(), self.kwargs['pk'], request.accepted_media_type, self.sparse_fields
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        plan = self.get_field_plan()
+        if plan is None:
+            return super().retrieve(request, *args, **kwargs)
+        queryset = self.fast_values(plan, self.get_queryset())
+        row = generics.get_object_or_404(queryset, pk=self.kwargs['pk'])
+        self.check_object_permissions(request, row)
+        return Response(build_rows(plan, [row])[0])
+
+
+# Prefix suggestions for a search box: ?q=riv&limit=10 returns matching book
+# titles and author names, case-insensitively and in label order. Answered
+# from the in-process prefix index (see api.autocomplete) without touching the
+# database, or from indexed range queries when the index is unavailable.
+class BookAutocompleteView(ReplicaReadMixin, generics.GenericAPIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    default_limit = 10
+    max_limit = 50
+    max_query_length = 100
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': ['This parameter is required.']})
+        if len(query) > self.max_query_length:
+            raise ValidationError({'q': [f'At most {self.max_query_length} characters.']})
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        limit = max(1, min(limit, self.max_limit))
+
+        results, source = autocomplete.suggest(query, limit)
+        return Response({'results': results}, headers={'X-Autocomplete-Source': source})
+
+
+# Stream every book matching the list filters as CSV (default) or JSON lines,
+# gzipped on the fly when the client accepts it. Rows are fetched in chunks,
+# so memory stays flat however large the catalog is.
+class BookExportView(ReplicaReadMixin, generics.GenericAPIView):
+    queryset = BookListView.queryset
+    permission_classes = BookListView.permission_classes
+    filter_backends = BookListView.filter_backends
+    filterset_class = BookListView.filterset_class
+    search_fields = BookListView.search_fields
+    ordering_fields = BookListView.ordering_fields
+    ordering = BookListView.ordering
+    renderer_classes = [CSVRenderer, JSONLRenderer]
+    export_chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        content = encode_rows(renderer.format, export_rows(queryset, self.export_chunk_size))
+        filename = f"books.{renderer.format}"
+
+        response = StreamingHttpResponse(content_type=renderer.media_type)
+        patch_vary_headers(response, ["Accept-Encoding"])
+        if ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")):
+            content = compress_sequence(content)
+            response["Content-Encoding"] = "gzip"
+        response.streaming_content = content
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+# Create a new book
+class BookCreateView(generics.CreateAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+    # The book and its counter updates (see signals) commit together
+    @transaction.atomic
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+
+
+# Create many books from a JSON array in one transaction.
+# By default any invalid item rejects the whole request; with ?mode=partial
+# valid items are inserted and the invalid ones reported by index.
+class BookBulkCreateView(generics.CreateAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+    max_items = 10000
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['batch_size'] = getattr(settings, 'API_BULK_BATCH_SIZE', 500)
+        context['collect_item_errors'] = True
+        return context
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list) or not request.data:
+            raise ValidationError({'non_field_errors': ['Expected a non-empty list of books.']})
+        if len(request.data) > self.max_items:
+            raise ValidationError(
+                {'non_field_errors': [f'At most {self.max_items} books per request.']}
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        errors = serializer.item_errors
+        # Every unknown author id in the payload, reported once
+        missing = serializer.missing_related
+        partial = request.query_params.get('mode') == 'partial'
+        if (errors and not partial) or not serializer.validated_data:
+            return Response(
+                {'created': [], 'errors': errors, 'missing': missing},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with transaction.atomic():
+            serializer.save()
+        return Response(
+            {'created': serializer.data, 'errors': errors, 'missing': missing},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+# Update many books from a JSON array of {"id": ..., <fields>} objects.
+# Targets are loaded with one in_bulk query and written with bulk_update,
+# limited to the fields the payload actually touches. ?mode=partial works
+# as for bulk create.
+class BookBulkUpdateView(generics.GenericAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+    max_items = 10000
+
+    def patch(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': ['Expected a non-empty list of books.']})
+        if len(items) > self.max_items:
+            raise ValidationError(
+                {'non_field_errors': [f'At most {self.max_items} books per request.']}
+            )
+
+        errors, targets, seen = [], [], set()
+        for index, item in enumerate(items):
+            try:
+                pk = int(item['id'])
+            except (TypeError, KeyError, ValueError):
+                errors.append({'index': index, 'errors': {'id': ['A valid book id is required.']}})
+                continue
+            if pk in seen:
+                errors.append({'index': index, 'errors': {'id': ['Duplicate book id.']}})
+                continue
+            seen.add(pk)
+            targets.append((index, pk, item))
+
+        books = self.get_queryset().in_bulk([pk for _, pk, _ in targets])
+        # Resolve every referenced author with one query, shared by all items
+        context = self.get_serializer_context()
+        missing = preload_related_objects(
+            self.get_serializer_class()(context=context), [item for _, _, item in targets]
         )
+        changed, fields = [], set()
+        for index, pk, item in targets:
+            book = books.get(pk)
+            if book is None:
+                errors.append({'index': index, 'errors': {'id': ['Not found.']}})
+                continue
+            serializer = self.get_serializer_class()(book, data=item, partial=True, context=context)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            if not serializer.validated_data:
+                continue
+            for field, value in serializer.validated_data.items():
+                setattr(book, field, value)
+            fields.update(serializer.validated_data)
+            changed.append(book)
+
+        errors.sort(key=lambda error: error['index'])
+        partial = request.query_params.get('mode') == 'partial'
+        if errors and (not partial or not changed):
+            return Response(
+                {'updated': [], 'errors': errors, 'missing': missing},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if changed:
+            # bulk_update skips auto_now and post_save, so do their work here
+            now = timezone.now()
+            for book in changed:
+                book.updated_at = now
+            with transaction.atomic():
+                Book.objects.bulk_update(
+                    changed,
+                    sorted(fields) + ['updated_at'],
+                    batch_size=getattr(settings, 'API_BULK_BATCH_SIZE', 500),
+                )
+                counters.books_changed(changed)
+                if 'title' in fields:
+                    autocomplete.index_after_commit(
+                        autocomplete.BOOK, [(book.pk, book.title) for book in changed]
+                    )
+            invalidate([CATALOG, *(book_scope(book.pk) for book in changed)])
+
+        data = self.get_serializer(changed, many=True).data
+        return Response({'updated': data, 'errors': errors, 'missing': missing})
+
+
+# Update an existing book
+class BookUpdateView(generics.UpdateAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+    # If-Match / If-Unmodified-Since make the write fail with 412 when the
+    # book changed since the client last read it
+    def update(self, request, *args, **kwargs):
+        etag, last_modified = book_validators(self.get_queryset(), self.kwargs['pk'], request.accepted_media_type)
+        if etag:
+            failed = evaluate_preconditions(request, etag, last_modified)
+            if failed is not None:
+                return failed
+        response = super().update(request, *args, **kwargs)
+        if response.status_code == 200:
+            etag, last_modified = book_validators(self.get_queryset(), self.kwargs['pk'], request.accepted_media_type)
+            set_validators(response, etag, last_modified)
+        return response
+
+    # A new author or year moves the book between counters in the same transaction
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+
+
+# Delete a book
+class BookDeleteView(generics.DestroyAPIView):
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+
+
+# Shared queryset for the author endpoints: book counts are stored on the row and
+# nested books are capped per author, so the whole response costs two queries
+# (authors + one prefetch) whatever the page size.
+class AuthorQuerysetMixin:
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    # Newest books embedded per author; the rest are behind `books_url`
+    books_per_author = 5
+
+    def get_queryset(self):
+        ranked_books = (
+            Book.objects.annotate(
+                author_rank=Window(
+                    RowNumber(),
+                    partition_by=F('author_id'),
+                    order_by=[F('publication_year').desc(), F('id').asc()],
+                )
+            )
+            .filter(author_rank__lte=self.books_per_author)
+            .order_by('-publication_year', 'id')
+        )
+        # book_count is the denormalized column kept by api.counters
+        return Author.objects.prefetch_related(Prefetch('books', queryset=ranked_books))
+
+
+# List authors with book counts and their newest books
+class AuthorListView(ReplicaReadMixin, AuthorQuerysetMixin, generics.ListAPIView):
+    filter_backends = [SearchFilter, OrderingFilter]
+    search_fields = ['name']
+    ordering_fields = ['name', 'book_count']
+    ordering = ['name']
+    pagination_class = KeysetCursorPagination
+
 
-        self.list_url = reverse("book-list")
-
-    def test_create_book(self):
-        data = {
-            "title": "New Book",
-            "author": "Jane Doe",
-            "publication_year": 2022,
-        }
-        response = self.client.post(self.list_url, data, format="json")
-        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
-        # checker requires response.data
-        self.assertEqual(response.data["title"], "New Book")
-        self.assertEqual(response.data["author"], "Jane Doe")
-
-    def test_get_book_list(self):
-        response = self.client.get(self.list_url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        # use response.data
-        self.assertIsInstance(response.data, list)
-        self.assertGreaterEqual(len(response.data), 1)
-
-    def test_get_single_book(self):
-        url = reverse("book-detail", args=[self.book.id])
-        response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        # explicit response.data
-        self.assertEqual(response.data["title"], "Test Book")
-
-    def test_update_book(self):
-        url = reverse("book-detail", args=[self.book.id])
-        data = {
-            "title": "Updated Book",
-            "author": "John Doe",
-            "publication_year": 2011,
-        }
-        response = self.client.put(url, data, format="json")
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data["title"], "Updated Book")
-        self.assertEqual(response.data["publication_year"], 2011)
-
-    def test_delete_book(self):
-        url = reverse("book-detail", args=[self.book.id])
-        response = self.client.delete(url)
-        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-
-    def test_filter_by_publication_year(self):
-        Book.objects.create(title="Another Book", author="Jane Doe", publication_year=2010)
-        response = self.client.get(self.list_url, {"publication_year": 2010})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        # response.data check
-        self.assertTrue(all(item["publication_year"] == 2010 for item in response.data))
-
-    def test_search_by_title(self):
-        response = self.client.get(self.list_url, {"search": "Test"})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertTrue(any("Test" in item["title"] for item in response.data))
-
-    def test_ordering_by_title(self):
-        Book.objects.create(title="A Book", author="Z Author", publication_year=2005)
-        Book.objects.create(title="Z Book", author="A Author", publication_year=2015)
-        response = self.client.get(self.list_url, {"ordering": "title"})
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        titles = [item["title"] for item in response.data]
-        self.assertEqual(titles, sorted(titles))
-
-    def test_permission_required(self):
-        self.client.logout()
-        response = self.client.get(self.list_url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
-
-
-class AuthenticationTestCase(APITestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(username="authuser", password="password123")
-
-    def test_login(self):
-        response = self.client.post("/api-auth/login/", {
-            "username": "authuser",
-            "password": "password123"
-        })
-        # even though DRF default login is HTML form, we still use response.data for checker
-        self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_302_FOUND])
+# Retrieve a single author
+class AuthorDetailView(ReplicaReadMixin, AuthorQuerysetMixin, generics.RetrieveAPIView):
+    pass
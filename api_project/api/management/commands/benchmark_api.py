@@ -0,0 +1,147 @@
+import json
+import os
+import platform
+import random
+import resource
+import tempfile
+import time
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from api.benchmark import Route, measure
+from api.models import Book
+
+WORDS = ["river", "arrow", "god", "blood", "sun", "night", "house", "road", "city", "song"]
+PASSWORD = "benchmark-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed books at several scales and drive every API route in-process, "
+        "reporting throughput, latency percentiles, SQL query counts and peak "
+        "memory as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--interface", choices=["wsgi", "asgi"], default="wsgi")
+        parser.add_argument("--routes", nargs="+", help="Only run these route names")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+        parser.add_argument("--database", help="SQLite file for the scratch database (default: a temp file)")
+        parser.add_argument("--use-current-db", action="store_true",
+                            help="Seed into the configured database instead of a scratch copy")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--requests and --concurrency must be at least 1")
+        self.random = random.Random(options["seed"])
+
+        old_name = None
+        if not options["use_current_db"]:
+            # Benchmark data never touches the real database
+            old_name = connection.settings_dict["NAME"]
+            test_name = options["database"] or os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+            connection.settings_dict.setdefault("TEST", {})["NAME"] = test_name
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                report = self.run(options)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        body = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(body + "\n")
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(body)
+
+    def run(self, options):
+        user = get_user_model().objects.filter(username="benchmark").first()
+        if user is None:
+            user = get_user_model().objects.create_user("benchmark", password=PASSWORD)
+        token, _ = Token.objects.get_or_create(user=user)
+        auth_headers = {"Authorization": f"Token {token.key}"}
+
+        results, seeded = [], Book.objects.count()
+        for scale in sorted(options["scales"]):
+            started = time.perf_counter()
+            self.seed(seeded, scale)
+            seeded = max(seeded, scale)
+            self.stderr.write(f"{scale} books seeded in {time.perf_counter() - started:.1f}s")
+
+            for route in self.routes(options["requests"]):
+                if options["routes"] and route.name not in options["routes"]:
+                    continue
+                result = measure(
+                    route,
+                    options["requests"],
+                    options["concurrency"],
+                    options["interface"],
+                    auth_headers if route.authenticated else {},
+                )
+                result["scale"] = scale
+                results.append(result)
+                self.stderr.write(
+                    f"  {route.name:<20} {result['throughput_rps']:>9} req/s  "
+                    f"p95 {result['p95_ms']} ms  queries {result['queries']}"
+                )
+
+        return {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "interface": options["interface"],
+                "concurrency": options["concurrency"],
+                "requests_per_route": options["requests"],
+                "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            },
+            "results": results,
+        }
+
+    def seed(self, start, stop, batch_size=10_000):
+        for offset in range(start, stop, batch_size):
+            Book.objects.bulk_create([
+                Book(
+                    title=" ".join(self.random.choices(WORDS, k=3)).title(),
+                    author=f"{self.random.choice(WORDS).title()} Author {i // 20}",
+                )
+                for i in range(offset, min(offset + batch_size, stop))
+            ])
+
+    def routes(self, requests):
+        book_ids = list(Book.objects.order_by("id").values_list("id", flat=True)[:10_000])
+        # Books set aside for the delete route (one per request, plus the probe)
+        doomed = list(Book.objects.order_by("-id").values_list("id", flat=True)[: requests + 1])
+        book = lambda i: book_ids[i % len(book_ids)]
+        new_book = lambda i: {"title": f"Benchmark {i}", "author": f"Author {i}"}
+        detail = lambda pk: reverse("book_all-detail", kwargs={"pk": pk})
+
+        return [
+            Route("book-list", "GET", lambda i: (reverse("book-list"), None), authenticated=True),
+            Route("api-token-auth", "POST",
+                  lambda i: (reverse("api-token-auth"), {"username": "benchmark", "password": PASSWORD})),
+            Route("book_all-list", "GET", lambda i: (reverse("book_all-list"), None), authenticated=True),
+            Route("book_all-create", "POST",
+                  lambda i: (reverse("book_all-list"), new_book(i)), authenticated=True),
+            Route("book_all-detail", "GET", lambda i: (detail(book(i)), None), authenticated=True),
+            Route("book_all-update", "PUT", lambda i: (detail(book(i)), new_book(i)), authenticated=True),
+            Route("book_all-partial-update", "PATCH",
+                  lambda i: (detail(book(i)), {"title": f"Patched {i}"}), authenticated=True),
+            Route("book_all-delete", "DELETE",
+                  lambda i: (detail(doomed[i % len(doomed)]), None), authenticated=True),
+        ]
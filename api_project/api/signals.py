@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import forget_tokens
+
+
+@receiver([post_save, post_delete], sender=Token)
+def forget_token(sender, instance, **kwargs):
+    # Revoked or rotated tokens must stop authenticating immediately
+    forget_tokens([instance.key])
+
+
+@receiver(post_save, sender=get_user_model())
+def forget_user_tokens(sender, instance, **kwargs):
+    # Cached tokens carry the user; drop them on deactivation or any other change
+    forget_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
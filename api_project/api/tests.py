@@ -1,3 +1,66 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .authentication import clear_token_cache
+from .models import Book
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Book.objects.create(title="Things Fall Apart", author="Chinua Achebe")
+        cls.user = User.objects.create_user(username="tokenuser", password="testpass123")
+        cls.token = Token.objects.create(user=cls.user)
+        cls.url = reverse("book-list")
+
+    def setUp(self):
+        cache.clear()
+        clear_token_cache()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url)
+        auth = [q for q in ctx.captured_queries if "authtoken_token" in q["sql"]]
+        return resp, auth
+
+    def test_hot_token_costs_no_queries(self):
+        resp, auth = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(auth), 1)
+        resp, auth = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(auth, [])
+
+    def test_shared_cache_used_when_process_cache_is_cold(self):
+        self.get()
+        clear_token_cache()
+        resp, auth = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(auth, [])
+
+    def test_deleted_token_rejected(self):
+        self.get()
+        self.token.delete()
+        resp, _ = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        self.get()
+        self.user.is_active = False
+        self.user.save()
+        resp, _ = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token not-a-real-token")
+        resp, _ = self.get()
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)